@@ -1,37 +1,99 @@
 """Plotly 차트 빌더."""
 
+import hashlib
+import heapq
+import json
+from collections import Counter
+
+import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
+import plotly.io as pio
 import pandas as pd
+import streamlit as st
+
+try:
+    from tsdownsample import MinMaxLTTBDownsampler
+    HAS_TSDOWNSAMPLE = True
+except ImportError:
+    from utils.downsample import lttb_indices
+    HAS_TSDOWNSAMPLE = False
+
+try:
+    import orjson  # noqa: F401
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+# Figure 직렬화(st.plotly_chart → pio.to_json)를 orjson으로
+if HAS_ORJSON:
+    pio.json.config.default_engine = "orjson"
 
 _FONT = dict(family="Malgun Gothic, sans-serif")
-_THEME_KWARGS = dict(template="plotly_white")
 
+# 공통 레이아웃(폰트·축 포맷)은 템플릿으로 등록해 빌더마다 반복 지정하지 않음
+pio.templates["desker"] = go.layout.Template(layout=dict(
+    font=_FONT,
+    yaxis=dict(tickformat=","),
+))
+_THEME_KWARGS = dict(template="plotly_white+desker")
+_DOWNSAMPLE_N_OUT = 500
+_WEBGL_THRESHOLD = 1000  # 이 포인트 수를 넘으면 SVG 대신 WebGL(Scattergl) 사용
+
+
+def _hash_dict(d: dict) -> str:
+    """dict 입력을 내용 기반 해시로 변환 (st.cache_data 키)."""
+    payload = json.dumps(d, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.md5(payload.encode("utf-8")).hexdigest()
+
+
+# 빌더는 입력이 같으면 같은 Figure를 반환하므로 rerun 간 캐시
+_cached_builder = st.cache_data(show_spinner=False, max_entries=64, hash_funcs={dict: _hash_dict})
+
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+# 다운샘플링
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
 
+def _maybe_downsample(x, y, n_out: int = _DOWNSAMPLE_N_OUT) -> tuple[np.ndarray, np.ndarray]:
+    """포인트 수가 n_out을 넘으면 LTTB로 다운샘플링."""
+    x = np.asarray(x)
+    y = np.asarray(y)
+    if len(y) <= n_out:
+        return x, y
+
+    y_float = y.astype(np.float64, copy=False)
+    if HAS_TSDOWNSAMPLE:
+        idx = MinMaxLTTBDownsampler().downsample(y_float, n_out=n_out)
+    else:
+        idx = lttb_indices(np.arange(len(y_float), dtype=np.float64), y_float, n_out)
+    return x[idx], y[idx]
+
+
+@_cached_builder
 def bar_chart_product_cases(data: dict, title: str = "품목군별 건수") -> go.Figure:
     """품목군별 건수 수평 바 차트."""
     matrix = data.get("matrix", {})
-    products = list(matrix.keys())
-    counts = [sum(matrix[p].values()) for p in products]
+    counts = pd.DataFrame(matrix).fillna(0).sum(axis=0).astype("int64").sort_values()
 
-    df = pd.DataFrame({"품목군": products, "건수": counts})
-    df = df.sort_values("건수", ascending=True)
-
-    fig = px.bar(df, x="건수", y="품목군", orientation="h", title=title, **_THEME_KWARGS)
-    fig.update_layout(font=_FONT, height=max(300, len(products) * 30))
+    fig = px.bar(
+        x=counts.to_numpy(), y=counts.index,
+        labels={"x": "건수", "y": "품목군"},
+        orientation="h", title=title, **_THEME_KWARGS,
+    )
+    fig.update_layout(height=max(300, len(counts) * 30))
     return fig
 
 
+@_cached_builder
 def heatmap_product_cause(data: dict, title: str = "품목군 × 원인 히트맵") -> go.Figure:
     """품목군 × 원인 태그 히트맵."""
     matrix = data.get("matrix", {})
     products = data.get("products", [])
     tags = data.get("tags", [])
 
-    z = []
-    for p in products:
-        row = [matrix.get(p, {}).get(t, 0) for t in tags]
-        z.append(row)
+    z = pd.DataFrame(matrix).T.reindex(index=products, columns=tags).fillna(0)
+    z = np.asarray(z, dtype=np.int32)
 
     fig = go.Figure(data=go.Heatmap(
         z=z, x=tags, y=products,
@@ -40,51 +102,57 @@ def heatmap_product_cause(data: dict, title: str = "품목군 × 원인 히트
         texttemplate="%{text}",
     ))
     fig.update_layout(
-        title=title, font=_FONT,
+        title=title,
         height=max(400, len(products) * 35),
         **_THEME_KWARGS,
     )
     return fig
 
 
-def line_chart_trend(trend_data: dict, title: str = "월별 추이") -> go.Figure:
+@_cached_builder
+def line_chart_trend(trend_data: dict, title: str = "월별 추이",
+                     n_out: int = _DOWNSAMPLE_N_OUT) -> go.Figure:
     """다개월 추이 라인 차트."""
     months = trend_data["months"]
     totals = [trend_data["total_by_month"].get(m, 0) for m in months]
+    months, totals = _maybe_downsample(months, totals, n_out)
+    # 다운샘플 후 실제로 그릴 포인트 수로 트레이스 종류 결정
+    _scatter_cls = go.Scattergl if len(months) > _WEBGL_THRESHOLD else go.Scatter
 
     fig = go.Figure()
-    fig.add_trace(go.Scatter(
+    fig.add_trace(_scatter_cls(
         x=months, y=totals, mode="lines+markers", name="총 건수",
     ))
-    fig.update_layout(title=title, font=_FONT, xaxis_title="월", yaxis_title="건수", **_THEME_KWARGS)
+    fig.update_layout(title=title, xaxis_title="월", yaxis_title="건수", **_THEME_KWARGS)
     return fig
 
 
-def line_chart_cost_trend(trend_data: dict, title: str = "월별 하자보수비 추이") -> go.Figure:
+@_cached_builder
+def line_chart_cost_trend(trend_data: dict, title: str = "월별 하자보수비 추이",
+                          n_out: int = _DOWNSAMPLE_N_OUT) -> go.Figure:
     """다개월 비용 추이 라인 차트."""
     months = trend_data["months"]
     costs = [trend_data["cost_by_month"].get(m, 0) for m in months]
+    months, costs = _maybe_downsample(months, costs, n_out)
+    _scatter_cls = go.Scattergl if len(months) > _WEBGL_THRESHOLD else go.Scatter
 
     fig = go.Figure()
-    fig.add_trace(go.Scatter(
+    fig.add_trace(_scatter_cls(
         x=months, y=costs, mode="lines+markers", name="하자보수비",
         hovertemplate="%{x}<br>%{y:,.0f}원",
     ))
     fig.update_layout(
-        title=title, font=_FONT,
+        title=title,
         xaxis_title="월", yaxis_title="금액 (원)",
-        yaxis_tickformat=",",
         **_THEME_KWARGS,
     )
     return fig
 
 
+@_cached_builder
 def pie_chart_judgment_types(cases: list[dict], title: str = "판정형태 분포") -> go.Figure:
     """판정형태별 분포 파이 차트."""
-    counts = {}
-    for c in cases:
-        jtype = c.get("judgment_type") or "(미분류)"
-        counts[jtype] = counts.get(jtype, 0) + 1
+    counts = Counter(c.get("judgment_type") or "(미분류)" for c in cases)
 
     fig = px.pie(
         names=list(counts.keys()),
@@ -92,63 +160,65 @@ def pie_chart_judgment_types(cases: list[dict], title: str = "판정형태 분
         title=title,
         **_THEME_KWARGS,
     )
-    fig.update_layout(font=_FONT)
     return fig
 
 
+@_cached_builder
 def waterfall_chart_mom(mom_data: dict, title: str = "전월 대비 증감") -> go.Figure:
     """품목별 전월 대비 증감 워터폴 차트."""
     by_product = mom_data.get("by_product", {})
 
     # 변동이 있는 품목만, 절대값 기준 정렬
-    items = [(p, d["delta"]) for p, d in by_product.items() if d["delta"] != 0]
-    items.sort(key=lambda x: abs(x[1]), reverse=True)
-    items = items[:15]  # 상위 15개
+    s = pd.Series({p: d["delta"] for p, d in by_product.items()}, dtype="int64")
+    s = s[s != 0]
+    s = s.reindex(s.abs().sort_values(ascending=False, kind="stable").index).head(15)  # 상위 15개
 
-    if not items:
+    if s.empty:
         fig = go.Figure()
-        fig.update_layout(title=title, font=_FONT)
+        fig.update_layout(title=title, **_THEME_KWARGS)
         return fig
 
-    products = [i[0] for i in items]
-    deltas = [i[1] for i in items]
-    colors = ["#EF5350" if d > 0 else "#42A5F5" for d in deltas]
+    products = s.index.tolist()
+    deltas = s.to_numpy()
+    colors = np.where(deltas > 0, "#EF5350", "#42A5F5")
 
     fig = go.Figure(go.Bar(
         x=products, y=deltas,
         marker_color=colors,
-        text=[f"+{d}" if d > 0 else str(d) for d in deltas],
+        text=[f"+{d}" if d > 0 else str(d) for d in deltas.tolist()],
         textposition="outside",
     ))
     fig.update_layout(
-        title=title, font=_FONT,
+        title=title,
         xaxis_title="품목군", yaxis_title="증감 (건)",
         **_THEME_KWARGS,
     )
     return fig
 
 
+@_cached_builder
 def multi_line_by_subject(trend_data: dict, subject_key: str,
                           title: str = "항목별 추이",
                           top_n: int = 10) -> go.Figure:
     """품목/태그별 다개월 추이 멀티라인."""
     months = trend_data["months"]
+    _scatter_cls = go.Scattergl if len(months) > _WEBGL_THRESHOLD else go.Scatter
     data_by_subject = trend_data.get(subject_key, {})
 
     # 최근 월 기준 상위 N개
     last_month = months[-1] if months else None
-    ranked = sorted(
+    ranked = heapq.nlargest(
+        top_n,
         data_by_subject.items(),
         key=lambda x: x[1].get(last_month, 0),
-        reverse=True,
-    )[:top_n]
+    )
 
     fig = go.Figure()
     for subject, month_data in ranked:
         values = [month_data.get(m, 0) for m in months]
-        fig.add_trace(go.Scatter(
+        fig.add_trace(_scatter_cls(
             x=months, y=values, mode="lines+markers", name=subject,
         ))
 
-    fig.update_layout(title=title, font=_FONT, xaxis_title="월", yaxis_title="건수", **_THEME_KWARGS)
+    fig.update_layout(title=title, xaxis_title="월", yaxis_title="건수", **_THEME_KWARGS)
     return fig
@@ -2,9 +2,16 @@
 
 from __future__ import annotations
 
+import hashlib
+import json
+
+import numpy as np
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
+import streamlit as st
+
+from config import SPEC_MAP_GRID, SPEC_MAP_KEEP_OUTLIERS, SPEC_MAP_MAX_POINTS
 
 _FONT = dict(family="Malgun Gothic, sans-serif")
 _TEMPLATE = "plotly_white"
@@ -19,6 +26,45 @@ _CATEGORY_STYLE = {
 _OUR_STYLE = {"color": "#E53935", "symbol": "star", "size": 20}
 
 
+def _hash_dict(d: dict) -> str:
+    """dict 입력을 내용 기반 해시로 변환 (st.cache_data 키)."""
+    payload = json.dumps(d, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.md5(payload.encode("utf-8")).hexdigest()
+
+
+_cached_builder = st.cache_data(show_spinner=False, max_entries=32, hash_funcs={dict: _hash_dict})
+
+
+def _decimate_for_display(scored_df: pd.DataFrame, price_col: str) -> pd.DataFrame:
+    """제품 수가 많으면 (가격, 스펙 점수) 격자 셀마다 대표 1개만 남긴다.
+
+    가치 지수 상/하위 제품은 셀 중복과 무관하게 항상 유지한다.
+    """
+    if len(scored_df) <= SPEC_MAP_MAX_POINTS:
+        return scored_df
+
+    price = scored_df[price_col].to_numpy(dtype=np.float64)
+    score = scored_df["spec_score"].to_numpy(dtype=np.float64)
+    nx, ny = SPEC_MAP_GRID
+    xb = np.digitize(price, np.linspace(np.nanmin(price), np.nanmax(price), nx))
+    yb = np.digitize(score, np.linspace(np.nanmin(score), np.nanmax(score), ny))
+
+    # 셀별 첫 번째 제품
+    _, first = np.unique(xb * (ny + 2) + yb, return_index=True)
+    keep = np.zeros(len(scored_df), dtype=bool)
+    keep[first] = True
+
+    if "value_index" in scored_df.columns:
+        vi = scored_df["value_index"].to_numpy(dtype=np.float64)
+        valid = np.flatnonzero(~np.isnan(vi))
+        order = valid[np.argsort(vi[valid])]
+        keep[order[:SPEC_MAP_KEEP_OUTLIERS]] = True
+        keep[order[-SPEC_MAP_KEEP_OUTLIERS:]] = True
+
+    return scored_df.iloc[keep]
+
+
+@_cached_builder
 def build_positioning_map(
     scored_df: pd.DataFrame,
     column_config: dict,
@@ -26,35 +72,39 @@ def build_positioning_map(
     our_product: dict | None = None,
     show_quadrant_lines: bool = True,
     show_labels: bool = True,
+    stats: pd.DataFrame | None = None,
 ) -> go.Figure:
-    """X=가격, Y=스펙 점수 스캐터 포지셔닝 맵을 생성한다."""
+    """X=가격, Y=스펙 점수 스캐터 포지셔닝 맵을 생성한다.
+
+    stats: [price_col, "spec_score"] × ["min", "max", "median"] 집계 (없으면 직접 계산)
+    """
     fig = go.Figure()
 
     product_col = column_config["product_col"]
     price_col = column_config["price_col"]
     spec_cols = column_config["spec_cols"]
 
-    # 카테고리별 트레이스 추가
+    # 카테고리별 트레이스 추가 (제품이 많으면 격자 축약본만 표시)
+    plot_df = _decimate_for_display(scored_df, price_col)
+    cat_series = plot_df[product_col].astype(str).map(categories).fillna("")
     for cat_name, style in _CATEGORY_STYLE.items():
-        mask = scored_df[product_col].map(
-            lambda name, cn=cat_name: categories.get(str(name)) == cn
-        )
-        subset = scored_df[mask]
+        mask = cat_series.to_numpy() == cat_name
+        subset = plot_df.loc[mask]
         if subset.empty:
             continue
 
-        hover_texts = []
-        for _, row in subset.iterrows():
-            parts = [f"<b>{row[product_col]}</b>"]
-            parts.append(f"가격: {row[price_col]:,.0f}")
-            parts.append(f"스펙 점수: {row['spec_score']:.1f}")
-            for sc in spec_cols:
-                parts.append(f"{sc}: {row[sc]}")
-            hover_texts.append("<br>".join(parts))
+        hover = (
+            "<b>" + subset[product_col].astype(str) + "</b>"
+            + "<br>가격: " + subset[price_col].map("{:,.0f}".format)
+            + "<br>스펙 점수: " + subset["spec_score"].map("{:.1f}".format)
+        )
+        for sc in spec_cols:
+            hover = hover + f"<br>{sc}: " + subset[sc].astype(str)
+        hover_texts = hover.tolist()
 
         fig.add_trace(go.Scatter(
-            x=subset[price_col],
-            y=subset["spec_score"],
+            x=subset[price_col].to_numpy(dtype=np.float32),
+            y=subset["spec_score"].to_numpy(dtype=np.float32),
             mode="markers+text" if show_labels else "markers",
             name=cat_name,
             text=subset[product_col] if show_labels else None,
@@ -99,8 +149,10 @@ def build_positioning_map(
 
     # 사분면 선
     if show_quadrant_lines and len(scored_df) >= 4:
-        median_price = scored_df[price_col].median()
-        median_score = scored_df["spec_score"].median()
+        if stats is None:
+            stats = scored_df[[price_col, "spec_score"]].agg(["min", "max", "median"])
+        median_price = stats.at["median", price_col]
+        median_score = stats.at["median", "spec_score"]
 
         fig.add_hline(
             y=median_score, line_dash="dash", line_color="gray", opacity=0.4,
@@ -118,8 +170,8 @@ def build_positioning_map(
         )
 
         # 사분면 라벨
-        x_min, x_max = scored_df[price_col].min(), scored_df[price_col].max()
-        y_min, y_max = scored_df["spec_score"].min(), scored_df["spec_score"].max()
+        x_min, x_max = stats.at["min", price_col], stats.at["max", price_col]
+        y_min, y_max = stats.at["min", "spec_score"], stats.at["max", "spec_score"]
         x_pad = (x_max - x_min) * 0.05
         y_pad = (y_max - y_min) * 0.05
 
@@ -153,6 +205,7 @@ def build_positioning_map(
     return fig
 
 
+@_cached_builder
 def build_weight_bar_chart(
     weights: dict[str, float],
     title: str = "스펙 가중치 분포",
@@ -181,18 +234,30 @@ def build_spec_radar_chart(
     products: list[dict],
     spec_cols: list[str],
     title: str = "스펙 비교 레이더 차트",
+    norm_matrix: np.ndarray | None = None,
+    product_names: list[str] | None = None,
 ) -> go.Figure:
-    """선택 제품들의 정규화된 스펙을 레이더 차트로 비교한다."""
+    """선택 제품들의 정규화된 스펙을 레이더 차트로 비교한다.
+
+    norm_matrix(제품 × spec_cols)와 product_names가 주어지면 dict 조회 없이 행을 그대로 사용한다.
+    """
     fig = go.Figure()
+    theta = list(spec_cols) + [spec_cols[0]]
 
-    for product in products:
-        r_values = [product.get(f"{sc}_norm", 0) for sc in spec_cols]
-        r_values.append(r_values[0])  # 폴리곤 닫기
-        theta = list(spec_cols) + [spec_cols[0]]
+    if norm_matrix is not None and product_names is not None:
+        rows = zip(product_names, np.asarray(norm_matrix, dtype=np.float64))
+        series = ((name, np.concatenate([r, r[:1]])) for name, r in rows)
+    else:
+        series = []
+        for product in products:
+            r_values = [product.get(f"{sc}_norm", 0) for sc in spec_cols]
+            r_values.append(r_values[0])  # 폴리곤 닫기
+            series.append((product.get("product_name", ""), r_values))
 
+    for name, r_values in series:
         fig.add_trace(go.Scatterpolar(
             r=r_values, theta=theta,
-            name=product.get("product_name", ""),
+            name=name,
             fill="toself",
             opacity=0.6,
         ))
@@ -4,11 +4,19 @@ from __future__ import annotations
 
 import io
 
+import numpy as np
 import pandas as pd
 import streamlit as st
 from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
 from openpyxl.styles import Alignment, Font, PatternFill
+from openpyxl.utils import get_column_letter
 
+# 엑셀 내보내기 공용 스타일 (호출마다 재생성하지 않도록 모듈 레벨에 둔다)
+_HEADER_FONT = Font(name="맑은 고딕", bold=True, color="FFFFFF", size=10)
+_HEADER_FILL = PatternFill(start_color="1E88E5", end_color="1E88E5", fill_type="solid")
+_BODY_FONT = Font(name="맑은 고딕", size=10)
+_CENTER = Alignment(horizontal="center")
 
 # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
 # 컬럼 매핑 UI
@@ -128,24 +136,20 @@ def render_scored_data_table(
     categories: dict[str, str] | None = None,
 ) -> None:
     """점수화된 데이터 테이블을 렌더링한다."""
+    product_col = column_config["product_col"]
     display_cols = [
-        column_config["product_col"],
+        product_col,
         column_config["price_col"],
     ] + column_config["spec_cols"] + ["spec_score"]
 
-    display_df = scored_df[display_cols].copy()
-    display_df["spec_score"] = display_df["spec_score"].round(1)
+    # 점수 내림차순 순열로 정렬·컬럼 선택을 한 번에 (소수점 표시는 column_config 포맷이 담당)
+    order = np.argsort(-scored_df["spec_score"].to_numpy(), kind="stable")
+    display_df = scored_df[display_cols].iloc[order]
 
     # 카테고리 컬럼 추가
     if categories:
-        display_df.insert(
-            1, "포지셔닝",
-            display_df[column_config["product_col"]].map(
-                lambda x: categories.get(str(x), "")
-            ),
-        )
-
-    display_df = display_df.sort_values("spec_score", ascending=False)
+        positioning = scored_df[product_col].astype(str).map(categories).fillna("")
+        display_df.insert(1, "포지셔닝", positioning.to_numpy()[order])
 
     st.dataframe(
         display_df,
@@ -167,8 +171,17 @@ def render_scored_data_table(
 def render_simulation_form(
     column_config: dict,
     raw_df: pd.DataFrame,
+    median_price: int | None = None,
+    select_options: dict | None = None,
 ) -> dict | None:
-    """우리 제품 시뮬레이션 입력 폼을 렌더링한다."""
+    """우리 제품 시뮬레이션 입력 폼을 렌더링한다.
+
+    median_price: 페이지에서 미리 집계한 가격 중앙값 (없으면 raw_df에서 계산)
+    select_options: 컬럼명 → selectbox 고유값 목록 캐시. 처음 보는 컬럼만 계산해 채운다
+        (raw_df가 바뀌면 페이지에서 비운다)
+    """
+    if select_options is None:
+        select_options = {}
     with st.form("simulation_form"):
         st.markdown("**우리 제품의 예상 스펙과 가격을 입력하세요**")
 
@@ -176,8 +189,8 @@ def render_simulation_form(
         with form_c1:
             product_name = st.text_input("제품명", value="우리 제품")
         with form_c2:
-            price_col = column_config["price_col"]
-            median_price = int(raw_df[price_col].median())
+            if median_price is None:
+                median_price = int(raw_df[column_config["price_col"]].median())
             price = st.number_input(
                 "가격", min_value=0, value=median_price, step=10000,
             )
@@ -199,7 +212,10 @@ def render_simulation_form(
                             key=f"sim_{sc}",
                         )
                     else:
-                        unique_vals = col_data.dropna().unique().tolist()
+                        unique_vals = select_options.get(sc)
+                        if unique_vals is None:
+                            unique_vals = col_data.dropna().unique().tolist()
+                            select_options[sc] = unique_vals
                         val = st.selectbox(sc, unique_vals, key=f"sim_{sc}")
                     specs[sc] = val
 
@@ -273,15 +289,21 @@ def export_positioning_to_excel(
     column_config: dict,
 ) -> bytes:
     """분석 결과를 엑셀 파일로 내보낸다 (2시트: 분석결과 + 가중치)."""
-    wb = Workbook()
-
-    header_font = Font(name="맑은 고딕", bold=True, color="FFFFFF", size=10)
-    header_fill = PatternFill(start_color="1E88E5", end_color="1E88E5", fill_type="solid")
-    body_font = Font(name="맑은 고딕", size=10)
+    wb = Workbook(write_only=True)
+
+    def _header_row(ws, headers: list[str], align: bool = False) -> list[WriteOnlyCell]:
+        cells = []
+        for h in headers:
+            cell = WriteOnlyCell(ws, value=h)
+            cell.font = _HEADER_FONT
+            cell.fill = _HEADER_FILL
+            if align:
+                cell.alignment = _CENTER
+            cells.append(cell)
+        return cells
 
     # 시트 1: 포지셔닝 분석
-    ws1 = wb.active
-    ws1.title = "포지셔닝 분석"
+    ws1 = wb.create_sheet("포지셔닝 분석")
 
     display_cols = (
         [column_config["product_col"], column_config["price_col"]]
@@ -289,38 +311,32 @@ def export_positioning_to_excel(
         + ["spec_score"]
     )
 
+    body = scored_df.reindex(columns=display_cols)
+    body["spec_score"] = body["spec_score"].round(1)
+
+    # write-only 시트는 행 기록 전에 컬럼 속성을 지정해야 함 (너비는 상위 200행 샘플 기준)
+    sample = body.head(200)
     for j, col in enumerate(display_cols, 1):
-        cell = ws1.cell(row=1, column=j, value=col)
-        cell.font = header_font
-        cell.fill = header_fill
-        cell.alignment = Alignment(horizontal="center")
-
-    for i, (_, row) in enumerate(scored_df.iterrows(), 2):
-        for j, col in enumerate(display_cols, 1):
-            val = row.get(col)
-            if col == "spec_score":
-                val = round(val, 1)
-            cell = ws1.cell(row=i, column=j, value=val)
-            cell.font = body_font
-
-    # 컬럼 너비 자동 조정
-    for j, col in enumerate(display_cols, 1):
-        ws1.column_dimensions[chr(64 + j) if j <= 26 else "A"].width = max(12, len(str(col)) + 4)
+        data_len = sample.iloc[:, j - 1].astype(str).str.len().max() if len(sample) else 0
+        dim = ws1.column_dimensions[get_column_letter(j)]
+        dim.width = max(12, len(str(col)) + 4, min(40, int(data_len) + 2))
+        dim.font = _BODY_FONT
+
+    ws1.append(_header_row(ws1, display_cols, align=True))
+
+    for row in body.itertuples(index=False, name=None):
+        ws1.append(row)
 
     # 시트 2: 가중치
     ws2 = wb.create_sheet("가중치")
-    for j, header in enumerate(["스펙 항목", "가중치"], 1):
-        cell = ws2.cell(row=1, column=j, value=header)
-        cell.font = header_font
-        cell.fill = header_fill
-
-    for i, (name, weight) in enumerate(
-        sorted(weights.items(), key=lambda x: x[1], reverse=True), 2
-    ):
-        ws2.cell(row=i, column=1, value=name).font = body_font
-        cell = ws2.cell(row=i, column=2, value=weight)
-        cell.font = body_font
-        cell.number_format = "0.0%"
+    ws2.column_dimensions["A"].font = _BODY_FONT
+    ws2.append(_header_row(ws2, ["스펙 항목", "가중치"]))
+
+    for name, weight in sorted(weights.items(), key=lambda x: x[1], reverse=True):
+        weight_cell = WriteOnlyCell(ws2, value=weight)
+        weight_cell.font = _BODY_FONT
+        weight_cell.number_format = "0.0%"
+        ws2.append([name, weight_cell])
 
     buf = io.BytesIO()
     wb.save(buf)
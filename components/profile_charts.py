@@ -2,6 +2,7 @@
 
 from __future__ import annotations
 
+import numpy as np
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
@@ -23,19 +24,19 @@ def stacked_bar_chart(
         fig.update_layout(title=title, font=_FONT, template=_TEMPLATE)
         return fig
 
-    categories = result_df["category"].tolist()
+    categories = result_df["category"].to_numpy()
 
     fig = go.Figure()
     for attr in attribute_values:
         if attr not in result_df.columns:
             continue
-        vals = result_df[attr].tolist()
+        vals = result_df[attr].to_numpy(dtype=np.float32)
         fig.add_trace(go.Bar(
             name=attr,
             x=vals if orientation == "h" else categories,
             y=categories if orientation == "h" else vals,
             orientation=orientation,
-            text=[f"{v:.1f}%" for v in vals],
+            text=np.char.mod("%.1f%%", vals),
             textposition="inside",
             insidetextanchor="middle",
             hovertemplate=f"{attr}: %{{text}}<extra></extra>",
@@ -71,17 +72,16 @@ def pie_chart(
     title: str | None = None,
 ) -> go.Figure:
     """특정 카테고리의 속성값 비중을 파이 차트로 표시한다."""
-    row = result_df[result_df["category"] == category_value]
-    if row.empty:
+    labels = [a for a in attribute_values if a in result_df.columns]
+    sub = result_df.loc[result_df["category"] == category_value, labels]
+    if sub.empty:
         fig = go.Figure()
         fig.update_layout(
             title=title or category_value, font=_FONT, template=_TEMPLATE,
         )
         return fig
 
-    row = row.iloc[0]
-    labels = [a for a in attribute_values if a in row.index]
-    values = [row[a] for a in labels]
+    values = sub.iloc[0].to_numpy()
 
     fig = px.pie(
         names=labels,
@@ -7,7 +7,22 @@ import io
 import pandas as pd
 import streamlit as st
 from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
 from openpyxl.styles import Alignment, Font, PatternFill
+from openpyxl.utils import get_column_letter
+
+try:
+    import xlsxwriter  # noqa: F401
+    HAS_XLSXWRITER = True
+except ImportError:
+    HAS_XLSXWRITER = False
+
+# openpyxl 내보내기 공용 스타일 (호출마다 재생성하지 않도록 모듈 레벨에 둔다)
+_TITLE_FONT = Font(name="맑은 고딕", bold=True, size=12)
+_HEADER_FONT = Font(name="맑은 고딕", bold=True, color="FFFFFF", size=10)
+_HEADER_FILL = PatternFill(start_color="1E88E5", end_color="1E88E5", fill_type="solid")
+_BODY_FONT = Font(name="맑은 고딕", size=10)
+_CENTER = Alignment(horizontal="center")
 
 
 def render_upload_status(profile_data: dict) -> None:
@@ -41,25 +56,35 @@ def render_percentage_table(
         st.info("분석 결과가 없습니다.")
         return
 
+    attr_cols = [a for a in attribute_values if a in result_df.columns]
+    has_total = "합계" in result_df.columns
+
+    if not show_absolute:
+        # 숫자 컬럼은 그대로 두고 표시 서식만 Styler로 지정 (문자열 컬럼 생성 생략)
+        fmt = {a: "{:.1f}%" for a in attr_cols}
+        if has_total:
+            fmt["합계"] = "{:,.0f}"
+        display_df = result_df[["category"] + list(fmt)].rename(
+            columns={"category": "카테고리"},
+        )
+        st.dataframe(
+            display_df.style.format(fmt), use_container_width=True, hide_index=True,
+        )
+        st.caption(f"총 {len(display_df)}개 카테고리")
+        return
+
     display_df = result_df[["category"]].copy()
 
-    for attr in attribute_values:
-        if attr not in result_df.columns:
-            continue
-        if show_absolute:
-            abs_col = f"{attr}_abs"
-            if abs_col in result_df.columns:
-                display_df[attr] = result_df.apply(
-                    lambda r, a=attr, ac=abs_col: f"{r[a]:.1f}% ({r[ac]:,.0f})",
-                    axis=1,
-                )
-            else:
-                display_df[attr] = result_df[attr].apply(lambda x: f"{x:.1f}%")
+    for attr in attr_cols:
+        pct = result_df[attr].map("{:.1f}%".format)
+        abs_col = f"{attr}_abs"
+        if abs_col in result_df.columns:
+            display_df[attr] = pct + " (" + result_df[abs_col].map("{:,.0f}".format) + ")"
         else:
-            display_df[attr] = result_df[attr].apply(lambda x: f"{x:.1f}%")
+            display_df[attr] = pct
 
-    if "합계" in result_df.columns:
-        display_df["합계"] = result_df["합계"].apply(lambda x: f"{x:,.0f}")
+    if has_total:
+        display_df["합계"] = result_df["합계"].map("{:,.0f}".format)
 
     display_df = display_df.rename(columns={"category": "카테고리"})
     st.dataframe(display_df, use_container_width=True, hide_index=True)
@@ -132,52 +157,105 @@ def export_profile_to_excel(
     attribute_values: list[str],
 ) -> bytes:
     """분석 결과를 엑셀 파일(bytes)로 내보낸다."""
-    wb = Workbook()
-    ws = wb.active
-    ws.title = f"{dimension}_{agg_level}"
+    if not HAS_XLSXWRITER:
+        return _export_profile_openpyxl(
+            result_df, dimension, metric, agg_level, attribute_values,
+        )
+
+    headers = ["카테고리"] + attribute_values + ["합계"]
+    # 비중은 퍼센트 값 그대로 기록 — 서식 '0.0"%"'는 값에 % 기호만 붙인다
+    body = result_df.reindex(columns=["category"] + attribute_values + ["합계"], fill_value=0)
+    n_attr = len(attribute_values)
+
+    buf = io.BytesIO()
+    with pd.ExcelWriter(buf, engine="xlsxwriter") as writer:
+        sheet_name = f"{dimension}_{agg_level}"
+        body.to_excel(writer, sheet_name=sheet_name, startrow=3, index=False, header=False)
+
+        book = writer.book
+        ws = writer.sheets[sheet_name]
+        title_fmt = book.add_format({"font_name": "맑은 고딕", "bold": True, "font_size": 12})
+        header_fmt = book.add_format({
+            "font_name": "맑은 고딕", "bold": True, "font_color": "#FFFFFF", "font_size": 10,
+            "bg_color": "#1E88E5", "align": "center",
+        })
+        body_fmt = book.add_format({"font_name": "맑은 고딕", "font_size": 10})
+        pct_fmt = book.add_format({
+            "font_name": "맑은 고딕", "font_size": 10, "num_format": '0.0"%"', "align": "center",
+        })
+        total_fmt = book.add_format({"font_name": "맑은 고딕", "font_size": 10, "num_format": "#,##0"})
+
+        # 제목 (1행) / 헤더 (3행)
+        ws.write(0, 0, f"고객 프로파일 분석: {dimension} / {metric} / {agg_level}", title_fmt)
+        ws.write_row(2, 0, headers, header_fmt)
+
+        # 열 너비 + 본문 서식
+        ws.set_column(0, 0, 25, body_fmt)
+        if n_attr:
+            ws.set_column(1, n_attr, 14, pct_fmt)
+        ws.set_column(n_attr + 1, n_attr + 1, 14, total_fmt)
+
+    return buf.getvalue()
 
-    header_font = Font(name="맑은 고딕", bold=True, color="FFFFFF", size=10)
-    header_fill = PatternFill(
-        start_color="1E88E5", end_color="1E88E5", fill_type="solid",
-    )
-    body_font = Font(name="맑은 고딕", size=10)
-    center = Alignment(horizontal="center")
 
-    # 제목
-    title_cell = ws.cell(
-        row=1, column=1,
-        value=f"고객 프로파일 분석: {dimension} / {metric} / {agg_level}",
+def _export_profile_openpyxl(
+    result_df: pd.DataFrame,
+    dimension: str,
+    metric: str,
+    agg_level: str,
+    attribute_values: list[str],
+) -> bytes:
+    """openpyxl write-only 경로 (xlsxwriter 미설치 시)."""
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(f"{dimension}_{agg_level}")
+
+    headers = ["카테고리"] + attribute_values + ["합계"]
+
+    # 열 너비 (write-only 시트는 행 기록 전에 지정)
+    ws.column_dimensions["A"].width = 25
+    for j in range(2, len(headers) + 1):
+        ws.column_dimensions[get_column_letter(j)].width = 14
+
+    # 제목 (1행) + 빈 행
+    title_cell = WriteOnlyCell(
+        ws, value=f"고객 프로파일 분석: {dimension} / {metric} / {agg_level}",
     )
-    title_cell.font = Font(name="맑은 고딕", bold=True, size=12)
+    title_cell.font = _TITLE_FONT
+    ws.append([title_cell])
+    ws.append([])
 
     # 헤더 (3행)
-    headers = ["카테고리"] + attribute_values + ["합계"]
-    for j, h in enumerate(headers, 1):
-        cell = ws.cell(row=3, column=j, value=h)
-        cell.font = header_font
-        cell.fill = header_fill
-        cell.alignment = center
-
-    # 데이터
-    for i, (_, row) in enumerate(result_df.iterrows(), start=4):
-        ws.cell(row=i, column=1, value=row["category"]).font = body_font
-        for j, attr in enumerate(attribute_values, start=2):
-            pct_val = row.get(attr, 0)
-            cell = ws.cell(row=i, column=j, value=pct_val / 100)
+    header_row = []
+    for h in headers:
+        cell = WriteOnlyCell(ws, value=h)
+        cell.font = _HEADER_FONT
+        cell.fill = _HEADER_FILL
+        cell.alignment = _CENTER
+        header_row.append(cell)
+    ws.append(header_row)
+
+    # 데이터 — 열 단위 numpy 배열을 한 번 만들어 행별로 zip (행마다 Series 생성 방지)
+    # 비중은 퍼센트 값 그대로 기록 — 서식 '0.0"%"'는 값에 % 기호만 붙인다
+    body = result_df.reindex(columns=["category"] + attribute_values + ["합계"], fill_value=0)
+    categories = body["category"].tolist()
+    pct_rows = body[attribute_values].to_numpy(dtype=float).tolist()
+    totals = body["합계"].tolist()
+    for category, pcts, total in zip(categories, pct_rows, totals):
+        cat_cell = WriteOnlyCell(ws, value=category)
+        cat_cell.font = _BODY_FONT
+        row_cells = [cat_cell]
+        for pct_val in pcts:
+            cell = WriteOnlyCell(ws, value=pct_val)
             cell.number_format = '0.0"%"'
-            cell.font = body_font
-            cell.alignment = center
+            cell.font = _BODY_FONT
+            cell.alignment = _CENTER
+            row_cells.append(cell)
 
-        total_cell = ws.cell(
-            row=i, column=len(attribute_values) + 2, value=row.get("합계", 0),
-        )
+        total_cell = WriteOnlyCell(ws, value=total)
         total_cell.number_format = "#,##0"
-        total_cell.font = body_font
-
-    # 열 너비
-    ws.column_dimensions["A"].width = 25
-    for j in range(2, len(headers) + 1):
-        ws.column_dimensions[chr(64 + j)].width = 14
+        total_cell.font = _BODY_FONT
+        row_cells.append(total_cell)
+        ws.append(row_cells)
 
     buf = io.BytesIO()
     wb.save(buf)
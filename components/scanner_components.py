@@ -5,7 +5,16 @@ import io
 import pandas as pd
 import streamlit as st
 from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
 from openpyxl.styles import Font, Alignment, PatternFill
+from openpyxl.utils import get_column_letter
+
+# 엑셀 내보내기 공용 스타일 (호출마다 재생성하지 않도록 모듈 레벨에 둔다)
+_HEADER_FONT = Font(name="맑은 고딕", bold=True, color="FFFFFF", size=10)
+_HEADER_FILL = PatternFill(start_color="1E88E5", end_color="1E88E5", fill_type="solid")
+_HEADER_ALIGN = Alignment(horizontal="center", vertical="center")
+_BODY_FONT = Font(name="맑은 고딕", size=10)
+_WRAP = Alignment(wrap_text=True, vertical="top")
 
 
 def render_product_card(product: dict, index: int):
@@ -85,23 +94,43 @@ def _render_review(review: dict):
             st.markdown(f"**리뷰 요약:** {summary}")
 
 
+def _normalize_product(p: dict) -> dict:
+    """비교 테이블/엑셀 공용 표시값 (문자열 조인·기본값 적용)."""
+    review = p.get("review_summary", {})
+    return {
+        "skip": bool(p.get("error")) and p.get("product_name") == "추출 실패",
+        "product_name": p.get("product_name", "정보 없음"),
+        "brand": p.get("brand", "정보 없음"),
+        "price_display": p.get("price_display", "정보 없음"),
+        "country_of_origin": p.get("country_of_origin", "정보 없음"),
+        "materials": p.get("materials", "정보 없음"),
+        "options": ", ".join(p.get("options", [])) or "정보 없음",
+        "size": p.get("size", "정보 없음"),
+        "summary_text": review.get("summary_text", "정보 없음"),
+        "positive_keywords": review.get("positive_keywords", []),
+        "negative_keywords": review.get("negative_keywords", []),
+        "notable_features": " / ".join(p.get("notable_features", [])) or "정보 없음",
+        "url": p.get("url", ""),
+    }
+
+
 def render_comparison_table(products: list[dict]) -> pd.DataFrame:
     """제품 비교 테이블 생성 및 렌더링."""
     rows = []
     for p in products:
-        if p.get("error") and p.get("product_name") == "추출 실패":
+        n = _normalize_product(p)
+        if n["skip"]:
             continue
-        review = p.get("review_summary", {})
         rows.append({
-            "제품명": p.get("product_name", "정보 없음"),
-            "브랜드": p.get("brand", "정보 없음"),
-            "가격": p.get("price_display", "정보 없음"),
-            "원산지": p.get("country_of_origin", "정보 없음"),
-            "소재": p.get("materials", "정보 없음"),
-            "옵션": ", ".join(p.get("options", [])) or "정보 없음",
-            "크기": p.get("size", "정보 없음"),
-            "리뷰 요약": review.get("summary_text", "정보 없음"),
-            "특이사항": " / ".join(p.get("notable_features", [])) or "정보 없음",
+            "제품명": n["product_name"],
+            "브랜드": n["brand"],
+            "가격": n["price_display"],
+            "원산지": n["country_of_origin"],
+            "소재": n["materials"],
+            "옵션": n["options"],
+            "크기": n["size"],
+            "리뷰 요약": n["summary_text"],
+            "특이사항": n["notable_features"],
         })
 
     if not rows:
@@ -156,65 +185,58 @@ def render_usp_analysis(comparison: dict):
 
 def export_comparison_to_excel(products: list[dict]) -> bytes:
     """비교 결과를 엑셀 파일로 내보내기."""
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "제품 비교"
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("제품 비교")
 
-    # 스타일
-    header_font = Font(name="맑은 고딕", bold=True, color="FFFFFF", size=10)
-    header_fill = PatternFill(start_color="1E88E5", end_color="1E88E5", fill_type="solid")
-    body_font = Font(name="맑은 고딕", size=10)
-    wrap_align = Alignment(wrap_text=True, vertical="top")
+    # 열 너비 설정 (write-only 시트는 행 기록 전에 지정)
+    widths = [5, 30, 15, 15, 10, 25, 25, 20, 40, 35, 40]
+    for j, w in enumerate(widths, 1):
+        ws.column_dimensions[get_column_letter(j)].width = w
 
     # 헤더
     headers = ["No", "제품명", "브랜드", "가격", "원산지", "소재",
                "옵션", "크기", "리뷰 요약", "특이사항", "URL"]
-    for j, h in enumerate(headers, 1):
-        cell = ws.cell(row=1, column=j, value=h)
-        cell.font = header_font
-        cell.fill = header_fill
-        cell.alignment = Alignment(horizontal="center", vertical="center")
+    header_row = []
+    for h in headers:
+        cell = WriteOnlyCell(ws, value=h)
+        cell.font = _HEADER_FONT
+        cell.fill = _HEADER_FILL
+        cell.alignment = _HEADER_ALIGN
+        header_row.append(cell)
+    ws.append(header_row)
 
     # 데이터
-    row_idx = 2
     for i, p in enumerate(products, 1):
-        if p.get("error") and p.get("product_name") == "추출 실패":
+        n = _normalize_product(p)
+        if n["skip"]:
             continue
-        review = p.get("review_summary", {})
-        review_text = review.get("summary_text", "정보 없음")
-        pos = review.get("positive_keywords", [])
-        neg = review.get("negative_keywords", [])
+        review_text = n["summary_text"]
+        pos = n["positive_keywords"]
+        neg = n["negative_keywords"]
         if pos or neg:
             review_text += f"\n긍정: {', '.join(pos)}" if pos else ""
             review_text += f"\n부정: {', '.join(neg)}" if neg else ""
 
         values = [
             i,
-            p.get("product_name", "정보 없음"),
-            p.get("brand", "정보 없음"),
-            p.get("price_display", "정보 없음"),
-            p.get("country_of_origin", "정보 없음"),
-            p.get("materials", "정보 없음"),
-            ", ".join(p.get("options", [])) or "정보 없음",
-            p.get("size", "정보 없음"),
+            n["product_name"],
+            n["brand"],
+            n["price_display"],
+            n["country_of_origin"],
+            n["materials"],
+            n["options"],
+            n["size"],
             review_text,
-            " / ".join(p.get("notable_features", [])) or "정보 없음",
-            p.get("url", ""),
+            n["notable_features"],
+            n["url"],
         ]
-        for j, v in enumerate(values, 1):
-            cell = ws.cell(row=row_idx, column=j, value=v)
-            cell.font = body_font
-            cell.alignment = wrap_align
-        row_idx += 1
-
-    # 열 너비 설정
-    widths = [5, 30, 15, 15, 10, 25, 25, 20, 40, 35, 40]
-    for j, w in enumerate(widths, 1):
-        ws.column_dimensions[chr(64 + j) if j <= 26 else ""].width = w
-    # openpyxl 열 문자 변환
-    from openpyxl.utils import get_column_letter
-    for j, w in enumerate(widths, 1):
-        ws.column_dimensions[get_column_letter(j)].width = w
+        row_cells = []
+        for v in values:
+            cell = WriteOnlyCell(ws, value=v)
+            cell.font = _BODY_FONT
+            cell.alignment = _WRAP
+            row_cells.append(cell)
+        ws.append(row_cells)
 
     buf = io.BytesIO()
     wb.save(buf)
@@ -16,6 +16,20 @@ FUZZY_MATCH_THRESHOLD = 80          # RapidFuzz 0-100
 
 # ── 배치 처리 ──
 BATCH_SIZE = 5                      # Claude API 1회 호출당 건수
+LLM_MAX_CONCURRENCY = 5             # Claude API 동시 요청 수
+LLM_REQUESTS_PER_MINUTE = 50        # Claude API 분당 요청 수 (조직 한도에 맞춰 조정)
+
+# ── Claude 응답 캐시 ──
+LLM_CACHE_PATH = DATA_DIR / "llm_cache.db"
+LLM_CACHE_TTL_SECONDS = 7 * 24 * 3600   # 7일
+LLM_CACHE_MEMORY_SIZE = 512             # 메모리 LRU 항목 수
+
+# ── Claude 응답 의미 캐시 (fastembed 설치 시) ──
+SEMANTIC_CACHE_DIR = DATA_DIR / "semantic_cache"
+SEMANTIC_CACHE_MODEL = "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
+SEMANTIC_CACHE_THRESHOLD = 0.95         # 코사인 유사도 이상이면 캐시 적중
+SEMANTIC_CACHE_MAX_ENTRIES = 5000
+SEMANTIC_CACHE_TEXT_CHARS = 2000        # 임베딩할 구조화 데이터 + 축약 본문 길이
 
 # ── 분석 ──
 SPECIAL_CASE_THRESHOLD = 5          # 월 N건 이상 시 특이 품목
@@ -54,6 +68,16 @@ SCANNER_MAX_URLS = 10
 SCANNER_REQUEST_TIMEOUT = 15         # URL당 요청 제한시간 (초)
 SCANNER_MAX_HTML_LENGTH = 50_000     # Claude 전송용 HTML 최대 길이 (문자)
 SCANNER_CONCURRENT_FETCHES = 3       # 동시 HTTP 요청 수
+SCANNER_EXTRACT_BATCH = 3            # Claude 1회 호출로 추출할 제품 수 (페이지 본문이 길어 작게 유지)
+SCANNER_PROMPT_MAX_TOKENS = 6000     # 제품 1건당 Claude에 보낼 본문 토큰 예산 (추정치)
+
+# ── 엑셀 파싱 ──
+EXCEL_USE_CALAMINE = True            # python-calamine 설치 시 Rust 파서 사용 (문제 시 False로 openpyxl)
+EXCEL_CACHE_DIR = DATA_DIR / "excel_cache"   # 파싱 결과 Parquet 캐시 (pyarrow 설치 시)
+
+# ── Convex 업로드 ──
+CONVEX_UPLOAD_WORKERS = 8            # 제품 배치 동시 업로드 수
+CONVEX_UPLOAD_BATCH = 100            # insertProducts 1회 호출당 제품 수 (env CONVEX_UPLOAD_BATCH로 변경)
 
 # ── 고객 프로파일 분석 ──
 PROFILE_DIMENSIONS = {
@@ -76,3 +100,6 @@ SPEC_POSITIONING_CATEGORIES = {
     "overprice": "과잉스펙",
 }
 SPEC_CHART_HEIGHT = 650
+SPEC_MAP_MAX_POINTS = 5000           # 포지셔닝 맵에 그대로 그릴 최대 제품 수
+SPEC_MAP_GRID = (200, 120)           # 초과 시 (가격, 스펙 점수) 격자 셀당 1개로 축약
+SPEC_MAP_KEEP_OUTLIERS = 20          # 축약 시에도 유지할 가치 지수 상/하위 개수
@@ -53,6 +53,40 @@ export const createCategory = mutation({
   },
 });
 
+// 여러 카테고리를 한 번에 생성하고 입력 순서대로 ID 배열 반환
+export const createCategoriesBulk = mutation({
+  args: {
+    sessionId: v.id("marketResearchSessions"),
+    categories: v.array(v.object({
+      name: v.string(),
+      specFields: v.array(v.string()),
+    })),
+  },
+  handler: async (ctx, args) => {
+    // 같은 세션에 이미 있는 이름(또는 이번 요청 안의 중복 이름)은 기존 ID 반환
+    const existing = await ctx.db
+      .query("marketCategories")
+      .withIndex("by_session", (q) => q.eq("sessionId", args.sessionId))
+      .collect();
+    const idsByName = new Map(existing.map((c) => [c.name, c._id]));
+
+    const ids = [];
+    for (const cat of args.categories) {
+      let id = idsByName.get(cat.name);
+      if (!id) {
+        id = await ctx.db.insert("marketCategories", {
+          sessionId: args.sessionId,
+          name: cat.name,
+          specFields: cat.specFields,
+        });
+        idsByName.set(cat.name, id);
+      }
+      ids.push(id);
+    }
+    return ids;
+  },
+});
+
 // ─────────────────────────────────────────
 // 제품 일괄 삽입
 // ─────────────────────────────────────────
@@ -83,6 +117,57 @@ export const insertProducts = mutation({
   },
 });
 
+// ─────────────────────────────────────────
+// 제품 일괄 삽입 (컬럼 형식)
+// 세션/카테고리 ID와 필드명을 제품마다 반복하지 않도록 열 배열로 받는다.
+// ─────────────────────────────────────────
+
+const optionalString = v.array(v.union(v.string(), v.null()));
+
+export const insertProductColumns = mutation({
+  args: {
+    sessionId: v.id("marketResearchSessions"),
+    categoryId: v.id("marketCategories"),
+    columns: v.object({
+      name: v.array(v.string()),
+      brand: v.array(v.string()),
+      price: v.array(v.float64()),
+      shippingFee: optionalString,
+      actualPrice: v.array(v.union(v.float64(), v.null())),
+      seller: optionalString,
+      material: optionalString,
+      origin: optionalString,
+      url: optionalString,
+      specs: v.array(v.any()),
+      isOurProduct: v.array(v.boolean()),
+    }),
+  },
+  handler: async (ctx, args) => {
+    const c = args.columns;
+    const optional = (key: string, val: string | number | null) =>
+      val === null ? {} : { [key]: val };
+
+    for (let i = 0; i < c.name.length; i++) {
+      await ctx.db.insert("marketProducts", {
+        sessionId: args.sessionId,
+        categoryId: args.categoryId,
+        name: c.name[i],
+        brand: c.brand[i],
+        price: c.price[i],
+        ...optional("shippingFee", c.shippingFee[i]),
+        ...optional("actualPrice", c.actualPrice[i]),
+        ...optional("seller", c.seller[i]),
+        ...optional("material", c.material[i]),
+        ...optional("origin", c.origin[i]),
+        ...optional("url", c.url[i]),
+        specs: c.specs[i],
+        isOurProduct: c.isOurProduct[i],
+      });
+    }
+    return c.name.length;
+  },
+});
+
 // ─────────────────────────────────────────
 // 세션 목록 조회
 // ─────────────────────────────────────────
@@ -1,21 +1,63 @@
 """집계, 전월 비교, 추이 분석, 이상 탐지."""
 
+import copy
 import json
-from collections import Counter, defaultdict
+import threading
+from collections import Counter, OrderedDict, defaultdict
+
+import numpy as np
 
 from config import (
-    SPECIAL_CASE_THRESHOLD, ANOMALY_CONSECUTIVE, ANOMALY_ZSCORE,
+    DB_PATH, SPECIAL_CASE_THRESHOLD, ANOMALY_CONSECUTIVE, ANOMALY_ZSCORE,
     JUDGMENT_EXCHANGE, JUDGMENT_COMPLAINT,
 )
 from core.database import (
-    get_connection, get_tagged_cases_by_month, get_cases_by_month,
+    get_connection, get_tagged_cases_by_month, get_cases_by_judgment,
+    count_cases_by_months, get_tagged_cases_df,
     save_snapshot, load_snapshot,
 )
 
 
+def _costs_by_month(conn, months: list[str]) -> dict:
+    """월별 하자보수비 (단일 IN 쿼리). 같은 월 파일이 여럿이면 먼저 등록된 값."""
+    if not months:
+        return {}
+    placeholders = ",".join("?" * len(months))
+    rows = conn.execute(
+        f"""SELECT year_month, total_cost FROM uploaded_files
+            WHERE year_month IN ({placeholders}) ORDER BY id""",
+        list(months),
+    ).fetchall()
+    costs = {}
+    for r in rows:
+        costs.setdefault(r["year_month"], r["total_cost"])
+    return costs
+
+
+# product_tag_matrix 결과 캐시: (DB 경로, 월, 태그 데이터 지문) → 결과
+# Streamlit 세션 스레드가 공유하므로 _MATRIX_LOCK 안에서만 다루고, 호출자에게는 사본을 준다
+_MATRIX_CACHE: OrderedDict[tuple, dict] = OrderedDict()
+_MATRIX_CACHE_SIZE = 64
+_MATRIX_LOCK = threading.Lock()
+
+
+def _tagged_fingerprint(conn, year_month: str) -> tuple:
+    """해당 월 케이스 태그의 변경 여부를 판별하는 가벼운 지문 (건수, 최대 id, tag_id 합)."""
+    row = conn.execute(
+        """SELECT COUNT(*), MAX(ct.id), SUM(ct.tag_id)
+           FROM case_tags ct
+           JOIN repair_cases rc ON rc.id = ct.case_id
+           WHERE rc.year_month = ?""",
+        (year_month,),
+    ).fetchone()
+    return tuple(row)
+
+
 def product_tag_matrix(conn, year_month: str) -> dict:
     """품목군 × 원인 태그 건수 매트릭스.
 
+    같은 월의 태그 데이터가 바뀌지 않았으면 이전 집계 결과를 재사용한다.
+
     Returns:
         {
             "matrix": {품목군: {태그: 건수, ...}, ...},
@@ -24,24 +66,42 @@ def product_tag_matrix(conn, year_month: str) -> dict:
             "total_cases": int,
         }
     """
-    tagged = get_tagged_cases_by_month(conn, year_month)
-
-    matrix = defaultdict(lambda: Counter())
-    for row in tagged:
-        product = row.get("product_group") or "(미분류)"
-        tag = row.get("standard_tag") or "(미분류)"
-        matrix[product][tag] += 1
-
-    products = sorted(matrix.keys())
-    all_tags = sorted(set(tag for counts in matrix.values() for tag in counts))
-
-    return {
-        "matrix": {p: dict(matrix[p]) for p in products},
+    db_path = getattr(conn, "db_path", "") or str(DB_PATH)
+    key = (db_path, year_month, _tagged_fingerprint(conn, year_month))
+    with _MATRIX_LOCK:
+        cached = _MATRIX_CACHE.get(key)
+        if cached is not None:
+            _MATRIX_CACHE.move_to_end(key)
+    if cached is not None:
+        return copy.deepcopy(cached)
+
+    df = get_tagged_cases_df(conn, year_month)
+    cols = ["product_group", "standard_tag"]
+    df[cols] = df[cols].replace("", None).fillna("(미분류)")
+
+    # groupby 결과는 (품목, 태그) 정렬 순이고 건수 0인 쌍이 없으므로
+    # 그대로 희소 중첩 dict로 옮기면 품목 순서도 정렬돼 있다
+    counts = df.groupby(cols).size()
+    matrix: dict[str, dict[str, int]] = {}
+    for (p, t), n in zip(counts.index, counts.tolist()):
+        matrix.setdefault(p, {})[t] = n
+
+    products = list(matrix)
+    all_tags = sorted(counts.index.unique(level=1))
+
+    result = {
+        "matrix": matrix,
         "products": products,
         "tags": all_tags,
-        "total_cases": len(tagged),
+        "total_cases": len(df),
     }
 
+    with _MATRIX_LOCK:
+        _MATRIX_CACHE[key] = copy.deepcopy(result)
+        if len(_MATRIX_CACHE) > _MATRIX_CACHE_SIZE:
+            _MATRIX_CACHE.popitem(last=False)
+    return result
+
 
 def month_over_month(conn, current_month: str, previous_month: str) -> dict:
     """전월 대비 증감 분석.
@@ -60,19 +120,19 @@ def month_over_month(conn, current_month: str, previous_month: str) -> dict:
     cur_data = get_tagged_cases_by_month(conn, current_month)
     prev_data = get_tagged_cases_by_month(conn, previous_month)
 
-    cur_by_product = Counter(r.get("product_group", "(미분류)") for r in cur_data)
-    prev_by_product = Counter(r.get("product_group", "(미분류)") for r in prev_data)
+    # 품목 / 태그 / 품목×태그 교차 건수를 한 번의 순회로 집계
+    def _count(rows: list[dict]) -> tuple[Counter, Counter, Counter]:
+        by_product, by_tag, cross = Counter(), Counter(), Counter()
+        for r in rows:
+            p = r.get("product_group", "(미분류)")
+            t = r.get("standard_tag", "(미분류)")
+            by_product[p] += 1
+            by_tag[t] += 1
+            cross[(p, t)] += 1
+        return by_product, by_tag, cross
 
-    cur_by_tag = Counter(r.get("standard_tag", "(미분류)") for r in cur_data)
-    prev_by_tag = Counter(r.get("standard_tag", "(미분류)") for r in prev_data)
-
-    # 품목×태그 교차 증감
-    cur_cross = Counter()
-    prev_cross = Counter()
-    for r in cur_data:
-        cur_cross[(r.get("product_group", ""), r.get("standard_tag", ""))] += 1
-    for r in prev_data:
-        prev_cross[(r.get("product_group", ""), r.get("standard_tag", ""))] += 1
+    cur_by_product, cur_by_tag, cur_cross = _count(cur_data)
+    prev_by_product, prev_by_tag, prev_cross = _count(prev_data)
 
     all_keys = set(cur_cross.keys()) | set(prev_cross.keys())
     increases = []
@@ -122,39 +182,31 @@ def multi_month_trend(conn, months: list[str]) -> dict:
             "by_tag_month": {태그: {월: 건수, ...}, ...},
         }
     """
-    total_by_month = {}
-    cost_by_month = {}
-    by_product = defaultdict(lambda: {})
-    by_tag = defaultdict(lambda: {})
-
-    for month in months:
-        cases = get_cases_by_month(conn, month)
-        tagged = get_tagged_cases_by_month(conn, month)
-
-        total_by_month[month] = len(cases)
-
-        # 비용
-        row = conn.execute(
-            "SELECT total_cost FROM uploaded_files WHERE year_month = ?", (month,)
-        ).fetchone()
-        cost_by_month[month] = row["total_cost"] if row and row["total_cost"] else 0
-
-        # 품목별
-        product_counts = Counter(r.get("product_group", "(미분류)") for r in tagged)
-        for p, cnt in product_counts.items():
-            by_product[p][month] = cnt
-
-        # 태그별
-        tag_counts = Counter(r.get("standard_tag", "(미분류)") for r in tagged)
-        for t, cnt in tag_counts.items():
-            by_tag[t][month] = cnt
+    case_counts = count_cases_by_months(conn, months)
+    total_by_month = {m: case_counts.get(m, 0) for m in months}
+
+    costs = _costs_by_month(conn, months)
+    cost_by_month = {m: costs.get(m) or 0 for m in months}
+
+    # 품목별 / 태그별 월 건수 — 전체 기간을 한 번에 읽어 groupby
+    tagged = get_tagged_cases_df(conn, months).fillna(
+        {"product_group": "(미분류)", "standard_tag": "(미분류)"}
+    )
+    by_product = (
+        tagged.groupby(["product_group", "year_month"]).size()
+        .unstack(fill_value=0).to_dict("index")
+    )
+    by_tag = (
+        tagged.groupby(["standard_tag", "year_month"]).size()
+        .unstack(fill_value=0).to_dict("index")
+    )
 
     return {
         "months": months,
         "total_by_month": total_by_month,
         "cost_by_month": cost_by_month,
-        "by_product_month": dict(by_product),
-        "by_tag_month": dict(by_tag),
+        "by_product_month": by_product,
+        "by_tag_month": by_tag,
     }
 
 
@@ -167,46 +219,58 @@ def detect_anomalies(trend_data: dict) -> list[dict]:
     """
     anomalies = []
     months = trend_data["months"]
+    n_months = len(months)
 
     # 품목별 + 태그별 모두 검사
     for label, data_by_month in [
         ("품목", trend_data.get("by_product_month", {})),
         ("태그", trend_data.get("by_tag_month", {})),
     ]:
-        for subject, month_data in data_by_month.items():
-            values = [month_data.get(m, 0) for m in months]
-
-            # 연속 증가 탐지
-            consecutive = 0
-            for i in range(1, len(values)):
-                if values[i] > values[i - 1]:
-                    consecutive += 1
-                else:
-                    consecutive = 0
-                if consecutive >= ANOMALY_CONSECUTIVE:
-                    anomalies.append({
-                        "type": "consecutive_increase",
-                        "subject": f"{label}: {subject}",
-                        "months": months[i - consecutive:i + 1],
-                        "detail": f"{consecutive + 1}개월 연속 증가",
-                    })
-
-            # 급증 탐지 (Z-score 기반)
-            if len(values) >= 3:
-                import statistics
-                mean = statistics.mean(values[:-1]) if len(values) > 1 else values[0]
-                stdev = statistics.stdev(values[:-1]) if len(values) > 2 else 0
-
-                if stdev > 0 and values[-1] > 0:
-                    zscore = (values[-1] - mean) / stdev
-                    if zscore >= ANOMALY_ZSCORE:
-                        anomalies.append({
-                            "type": "spike",
-                            "subject": f"{label}: {subject}",
-                            "months": [months[-1]],
-                            "detail": f"급증 (Z={zscore:.1f}, "
-                                      f"평균 {mean:.0f} → {values[-1]}건)",
-                        })
+        if not data_by_month or n_months == 0:
+            continue
+
+        subjects = list(data_by_month.keys())
+        vals = np.array(
+            [[d.get(m, 0) for m in months] for d in data_by_month.values()],
+        )
+
+        # 연속 증가 길이 (subjects × (months-1)) — 월 축만 순회, 주제 축은 벡터화
+        increasing = np.diff(vals, axis=1) > 0
+        runs = np.zeros(increasing.shape, dtype=np.int64)
+        for j in range(increasing.shape[1]):
+            prev = runs[:, j - 1] if j else 0
+            runs[:, j] = np.where(increasing[:, j], prev + 1, 0)
+
+        # 급증 (Z-score, 마지막 월 vs 이전 월들)
+        spikes = np.zeros(len(subjects), dtype=bool)
+        if n_months >= 3:
+            history = vals[:, :-1]
+            mean = history.mean(axis=1)
+            std = history.std(axis=1, ddof=1)
+            last = vals[:, -1]
+            zscore = (last - mean) / np.where(std > 0, std, 1)
+            spikes = (std > 0) & (last > 0) & (zscore >= ANOMALY_ZSCORE)
+
+        hits = runs >= ANOMALY_CONSECUTIVE
+        for s_idx in np.flatnonzero(hits.any(axis=1) | spikes):
+            subject = f"{label}: {subjects[s_idx]}"
+            for j in np.flatnonzero(hits[s_idx]):
+                consecutive = int(runs[s_idx, j])
+                i = j + 1  # months 기준 인덱스
+                anomalies.append({
+                    "type": "consecutive_increase",
+                    "subject": subject,
+                    "months": months[i - consecutive:i + 1],
+                    "detail": f"{consecutive + 1}개월 연속 증가",
+                })
+            if spikes[s_idx]:
+                anomalies.append({
+                    "type": "spike",
+                    "subject": subject,
+                    "months": [months[-1]],
+                    "detail": f"급증 (Z={zscore[s_idx]:.1f}, "
+                              f"평균 {mean[s_idx]:.0f} → {vals[s_idx, -1]}건)",
+                })
 
     return anomalies
 
@@ -221,7 +285,10 @@ def get_special_cases(conn, year_month: str,
             "complaint": {품목: [케이스 리스트], ...},
         }
     """
-    cases = get_cases_by_month(conn, year_month)
+    # 판정유형 필터는 SQL에서 처리해 해당 케이스만 가져온다
+    cases = get_cases_by_judgment(
+        conn, year_month, [JUDGMENT_EXCHANGE, JUDGMENT_COMPLAINT],
+    )
 
     exchange_by_product = defaultdict(list)
     complaint_by_product = defaultdict(list)
@@ -249,15 +316,9 @@ def get_cost_comparison(conn, current_month: str, previous_month: str) -> dict:
         {"current_cost": float, "previous_cost": float,
          "delta": float, "delta_pct": float}
     """
-    cur = conn.execute(
-        "SELECT total_cost FROM uploaded_files WHERE year_month = ?", (current_month,)
-    ).fetchone()
-    prev = conn.execute(
-        "SELECT total_cost FROM uploaded_files WHERE year_month = ?", (previous_month,)
-    ).fetchone()
-
-    cur_cost = cur["total_cost"] if cur and cur["total_cost"] else 0
-    prev_cost = prev["total_cost"] if prev and prev["total_cost"] else 0
+    costs = _costs_by_month(conn, [current_month, previous_month])
+    cur_cost = costs.get(current_month) or 0
+    prev_cost = costs.get(previous_month) or 0
     delta = cur_cost - prev_cost
     delta_pct = (delta / prev_cost * 100) if prev_cost else 0
 
@@ -1,6 +1,6 @@
 """컬럼 매핑 로직 — 자동 제안, 저장, 불러오기."""
 
-from rapidfuzz import fuzz
+from rapidfuzz import fuzz, process
 
 from config import DEFAULT_COLUMN_MAPPING
 
@@ -16,24 +16,28 @@ def suggest_mapping(headers: list[str],
     if default_map is None:
         default_map = DEFAULT_COLUMN_MAPPING
 
+    candidates = [h for h in headers if h]
+    header_set = set(candidates)
+
+    # 1) 정확 매치 — 매치되지 않은 키만 퍼지 후보로 남긴다
     suggested = {}
+    pending = []
     for key, default_col in default_map.items():
-        # 1) 정확 매치
-        if default_col in headers:
+        if default_col in header_set:
             suggested[key] = default_col
-            continue
-
-        # 2) 퍼지 매치
-        best_score = 0
-        best_match = ""
-        for h in headers:
-            if not h:
-                continue
-            score = fuzz.ratio(default_col, h)
-            if score > best_score:
-                best_score = score
-                best_match = h
-        suggested[key] = best_match if best_score >= 60 else ""
+        else:
+            suggested[key] = ""
+            pending.append((key, default_col))
+
+    # 2) 퍼지 매치: 남은 기본 컬럼 × 헤더 점수 행렬을 한 번에 계산 (동점이면 앞쪽 헤더)
+    if pending and candidates:
+        scores = process.cdist(
+            [col for _, col in pending], candidates, scorer=fuzz.ratio,
+        )
+        best = scores.argmax(axis=1)
+        for (key, _), row, j in zip(pending, scores, best):
+            if row[j] >= 60:
+                suggested[key] = candidates[j]
 
     return suggested
 
@@ -7,13 +7,41 @@ from __future__ import annotations
 
 import os
 import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import lru_cache
 
 import httpx
 from dotenv import load_dotenv
 
+try:
+    import h2  # noqa: F401  (httpx HTTP/2 지원)
+    HAS_H2 = True
+except ImportError:
+    HAS_H2 = False
+
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+from config import CONVEX_UPLOAD_WORKERS, CONVEX_UPLOAD_BATCH
+
 load_dotenv()
 
+_UPLOAD_BATCH = int(os.getenv("CONVEX_UPLOAD_BATCH", CONVEX_UPLOAD_BATCH))
+
+MAX_RETRIES = 3
+RETRY_DELAYS = [1, 3, 10]
+
+# 프로세스 전역 HTTP 클라이언트 (keep-alive로 연결 재사용)
+_CLIENT: httpx.Client | None = None
+_CLIENT_LOCK = threading.Lock()
 
+
+@lru_cache(maxsize=1)
 def _get_convex_url() -> str:
     """Convex 배포 URL을 가져온다."""
     url = ""
@@ -32,14 +60,47 @@ def _get_convex_url() -> str:
     return url.rstrip("/")
 
 
+def _get_client() -> httpx.Client:
+    """Convex 호출용 공유 httpx.Client (최초 호출 시 생성)."""
+    global _CLIENT
+    if _CLIENT is None:
+        with _CLIENT_LOCK:
+            if _CLIENT is None:
+                _CLIENT = httpx.Client(
+                    base_url=_get_convex_url(),
+                    timeout=30,
+                    http2=HAS_H2,
+                    limits=httpx.Limits(
+                        max_keepalive_connections=16, max_connections=32,
+                    ),
+                )
+    return _CLIENT
+
+
+def close() -> None:
+    """공유 HTTP 클라이언트를 닫는다 (종료 시 호출)."""
+    global _CLIENT
+    with _CLIENT_LOCK:
+        if _CLIENT is not None:
+            _CLIENT.close()
+            _CLIENT = None
+
+
+def _post(endpoint: str, function_name: str, args: dict) -> httpx.Response:
+    """Convex HTTP API 호출 (orjson 설치 시 본문을 직접 직렬화)."""
+    payload = {"path": function_name, "args": args, "format": "json"}
+    if HAS_ORJSON:
+        return _get_client().post(
+            endpoint,
+            content=orjson.dumps(payload, option=orjson.OPT_SERIALIZE_NUMPY),
+            headers={"Content-Type": "application/json"},
+        )
+    return _get_client().post(endpoint, json=payload)
+
+
 def _mutation(function_name: str, args: dict) -> dict:
     """Convex mutation 호출."""
-    url = _get_convex_url()
-    resp = httpx.post(
-        f"{url}/api/mutation",
-        json={"path": function_name, "args": args, "format": "json"},
-        timeout=30,
-    )
+    resp = _post("/api/mutation", function_name, args)
     resp.raise_for_status()
     data = resp.json()
     if data.get("status") == "error":
@@ -47,14 +108,28 @@ def _mutation(function_name: str, args: dict) -> dict:
     return data.get("value")
 
 
+def _mutation_with_retry(function_name: str, args: dict) -> dict:
+    """연결 실패/5xx 응답이면 지연 후 재시도하는 mutation 호출.
+
+    insertProductColumns 등은 멱등이 아니므로, 요청이 서버에 닿았을 수 있는
+    읽기 타임아웃·프로토콜 오류는 재시도하지 않는다 (중복 저장 방지).
+    """
+    for attempt in range(MAX_RETRIES):
+        try:
+            return _mutation(function_name, args)
+        except (httpx.ConnectError, httpx.ConnectTimeout, httpx.HTTPStatusError) as e:
+            retryable = (
+                not isinstance(e, httpx.HTTPStatusError)
+                or e.response.status_code >= 500
+            )
+            if not retryable or attempt == MAX_RETRIES - 1:
+                raise
+            time.sleep(RETRY_DELAYS[attempt])
+
+
 def _query(function_name: str, args: dict) -> dict:
     """Convex query 호출."""
-    url = _get_convex_url()
-    resp = httpx.post(
-        f"{url}/api/query",
-        json={"path": function_name, "args": args, "format": "json"},
-        timeout=30,
-    )
+    resp = _post("/api/query", function_name, args)
     resp.raise_for_status()
     data = resp.json()
     if data.get("status") == "error":
@@ -66,6 +141,25 @@ def _query(function_name: str, args: dict) -> dict:
 # 업로드
 # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
 
+def _product_columns(products: list[dict]) -> dict[str, list]:
+    """제품 dict 리스트를 insertProductColumns용 열 배열로 변환."""
+    return {
+        "name": [p["name"] for p in products],
+        "brand": [p["brand"] for p in products],
+        "price": [float(p["price"]) for p in products],
+        "shippingFee": [p.get("shippingFee") for p in products],
+        "actualPrice": [
+            float(p["actualPrice"]) if p.get("actualPrice") else None for p in products
+        ],
+        "seller": [p.get("seller") for p in products],
+        "material": [p.get("material") for p in products],
+        "origin": [p.get("origin") for p in products],
+        "url": [p.get("url") for p in products],
+        "specs": [p.get("specs", {}) for p in products],
+        "isOurProduct": [p.get("isOurProduct", False) for p in products],
+    }
+
+
 def upload_market_research(parsed_data: dict, progress_callback=None) -> str:
     """파싱된 시장조사 데이터를 Convex에 업로드한다.
 
@@ -93,46 +187,48 @@ def upload_market_research(parsed_data: dict, progress_callback=None) -> str:
     if progress_callback:
         progress_callback(0, total_products, "세션 생성 완료")
 
+    # 2. 카테고리 일괄 생성 (한 번의 요청, 입력 순서대로 ID 반환)
+    category_ids = _mutation("marketResearch:createCategoriesBulk", {
+        "sessionId": session_id,
+        "categories": [
+            {"name": c["name"], "specFields": c["spec_fields"]}
+            for c in categories
+        ],
+    })
+
     uploaded = 0
 
-    for cat in categories:
-        # 2. 카테고리 생성
-        category_id = _mutation("marketResearch:createCategory", {
-            "sessionId": session_id,
-            "name": cat["name"],
-            "specFields": cat["spec_fields"],
-        })
-
-        # 3. 제품 일괄 삽입 (배치 10개씩)
-        batch_size = 10
-        products_list = cat["products"]
-
-        for i in range(0, len(products_list), batch_size):
-            batch = products_list[i:i + batch_size]
-            convex_products = []
-
-            for p in batch:
-                convex_products.append({
-                    "sessionId": session_id,
-                    "categoryId": category_id,
-                    "name": p["name"],
-                    "brand": p["brand"],
-                    "price": float(p["price"]),
-                    "shippingFee": p.get("shippingFee"),
-                    "actualPrice": float(p["actualPrice"]) if p.get("actualPrice") else None,
-                    "seller": p.get("seller"),
-                    "material": p.get("material"),
-                    "origin": p.get("origin"),
-                    "url": p.get("url"),
-                    "specs": p.get("specs", {}),
-                    "isOurProduct": p.get("isOurProduct", False),
-                })
-
-            _mutation("marketResearch:insertProducts", {"products": convex_products})
-            uploaded += len(batch)
+    # 제품 배치는 스레드 풀로 동시 업로드
+    with ThreadPoolExecutor(max_workers=CONVEX_UPLOAD_WORKERS) as pool:
+        futures = {}
+        for cat, category_id in zip(categories, category_ids):
+            # 3. 제품 일괄 삽입 (배치 _UPLOAD_BATCH개씩) — 열 배열을 한 번 만들고 구간만 잘라 보낸다
+            columns = _product_columns(cat["products"])
+            n_products = len(cat["products"])
+
+            for i in range(0, n_products, _UPLOAD_BATCH):
+                batch_columns = {
+                    key: col[i:i + _UPLOAD_BATCH] for key, col in columns.items()
+                }
+                future = pool.submit(
+                    _mutation_with_retry,
+                    "marketResearch:insertProductColumns",
+                    {
+                        "sessionId": session_id,
+                        "categoryId": category_id,
+                        "columns": batch_columns,
+                    },
+                )
+                futures[future] = (cat["name"], len(batch_columns["name"]))
+
+        # 진행 상황 콜백은 호출 스레드에서만 실행
+        for future in as_completed(futures):
+            future.result()
+            cat_name, n = futures[future]
+            uploaded += n
 
             if progress_callback:
-                progress_callback(uploaded, total_products, f"{cat['name']} 업로드 중...")
+                progress_callback(uploaded, total_products, f"{cat_name} 업로드 중...")
 
     return session_id
 
@@ -1,38 +1,119 @@
 """SQLite 데이터베이스 — 스키마, 연결 관리, 쿼리 헬퍼."""
 
+import gzip
+import queue
 import sqlite3
 import json
+import threading
 from contextlib import contextmanager
 from pathlib import Path
 
+import pandas as pd
+
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
 from config import DB_PATH, DATA_DIR
 
 # ────────────────────────────────────────
 # 연결 관리
 # ────────────────────────────────────────
 
+_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",       # WAL에서는 NORMAL로도 커밋 내구성 유지
+    "PRAGMA busy_timeout=30000",       # 다른 탭/스레드의 쓰기 잠금 대기 (ms)
+    "PRAGMA cache_size=-65536",        # 페이지 캐시 64MB
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA mmap_size=268435456",      # 256MB 메모리 맵 읽기
+    "PRAGMA wal_autocheckpoint=1000",
+    "PRAGMA foreign_keys=ON",
+)
+
+_POOL_SIZE = 4
+_POOL: queue.LifoQueue = queue.LifoQueue(maxsize=_POOL_SIZE)
+_WRITE_LOCK = threading.RLock()
+
+
+class _Connection(sqlite3.Connection):
+    """풀링되는 연결. close()하면 실제로 닫지 않고 풀에 반환한다.
+
+    반환 시 PRAGMA optimize로 쿼리 플래너 통계를 갱신한다.
+    """
+
+    db_path: str = ""
+    pooled: bool = False
+
+    def close(self):
+        if self.pooled:
+            return
+        try:
+            if self.in_transaction:
+                self.rollback()
+            self.execute("PRAGMA optimize")
+        except sqlite3.Error:
+            self.discard()
+            return
+        self.pooled = True
+        try:
+            _POOL.put_nowait(self)
+        except queue.Full:
+            self.discard()
+
+    def discard(self):
+        """풀에 반환하지 않고 실제로 연결을 닫는다."""
+        self.pooled = True
+        super().close()
+
+
 def get_connection() -> sqlite3.Connection:
-    """WAL 모드, row_factory 설정된 SQLite 연결 반환."""
+    """WAL 모드, row_factory 설정된 SQLite 연결 반환 (풀에 여유 연결이 있으면 재사용)."""
+    path = str(DB_PATH)
+    while True:
+        try:
+            conn = _POOL.get_nowait()
+        except queue.Empty:
+            break
+        if conn.db_path == path:
+            conn.pooled = False
+            return conn
+        conn.discard()
+
     DATA_DIR.mkdir(parents=True, exist_ok=True)
-    conn = sqlite3.connect(str(DB_PATH), check_same_thread=False)
+    conn = sqlite3.connect(
+        path, check_same_thread=False, factory=_Connection, cached_statements=256,
+    )
+    conn.db_path = path
     conn.row_factory = sqlite3.Row
-    conn.execute("PRAGMA journal_mode=WAL")
-    conn.execute("PRAGMA foreign_keys=ON")
+    for pragma in _PRAGMAS:
+        conn.execute(pragma)
     return conn
 
 
 @contextmanager
 def transaction(conn: sqlite3.Connection | None = None):
-    """트랜잭션 컨텍스트 매니저. conn이 없으면 새로 생성."""
+    """트랜잭션 컨텍스트 매니저. conn이 없으면 풀에서 빌려 온다.
+
+    이미 진행 중인 트랜잭션이 있으면 그 안에서 실행하고 커밋은 바깥에 맡긴다.
+    """
     own = conn is None
     if own:
         conn = get_connection()
     try:
-        yield conn
-        conn.commit()
-    except Exception:
-        conn.rollback()
-        raise
+        if conn.in_transaction:
+            yield conn
+            return
+        with _WRITE_LOCK:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
     finally:
         if own:
             conn.close()
@@ -83,6 +164,8 @@ CREATE TABLE IF NOT EXISTS repair_cases (
 CREATE INDEX IF NOT EXISTS idx_cases_yearmonth ON repair_cases(year_month);
 CREATE INDEX IF NOT EXISTS idx_cases_product   ON repair_cases(product_group);
 CREATE INDEX IF NOT EXISTS idx_cases_judgment  ON repair_cases(judgment_type);
+CREATE INDEX IF NOT EXISTS idx_cases_ym_row    ON repair_cases(year_month, row_number);
+CREATE INDEX IF NOT EXISTS idx_cases_file      ON repair_cases(file_id);
 
 CREATE TABLE IF NOT EXISTS tag_dictionary (
     id              INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -114,6 +197,8 @@ CREATE TABLE IF NOT EXISTS case_tags (
 );
 CREATE INDEX IF NOT EXISTS idx_casetags_case  ON case_tags(case_id);
 CREATE INDEX IF NOT EXISTS idx_casetags_final ON case_tags(is_final);
+CREATE INDEX IF NOT EXISTS idx_casetags_case_final ON case_tags(case_id, is_final);
+CREATE INDEX IF NOT EXISTS idx_casetags_cover ON case_tags(case_id, tag_id, is_final, confidence, source);
 
 CREATE TABLE IF NOT EXISTS tag_edit_history (
     id              INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -148,20 +233,87 @@ CREATE TABLE IF NOT EXISTS new_tag_candidates (
 """
 
 
+# 조치내용/요청사항 전문 검색 인덱스 (FTS5 미지원 빌드면 생략)
+_FTS_SQL = """
+CREATE VIRTUAL TABLE IF NOT EXISTS repair_cases_fts USING fts5(
+    action_notes, request_details,
+    content='repair_cases', content_rowid='id',
+    tokenize='unicode61 remove_diacritics 2'
+);
+
+CREATE TRIGGER IF NOT EXISTS repair_cases_fts_ai AFTER INSERT ON repair_cases BEGIN
+    INSERT INTO repair_cases_fts(rowid, action_notes, request_details)
+    VALUES (new.id, new.action_notes, new.request_details);
+END;
+
+CREATE TRIGGER IF NOT EXISTS repair_cases_fts_ad AFTER DELETE ON repair_cases BEGIN
+    INSERT INTO repair_cases_fts(repair_cases_fts, rowid, action_notes, request_details)
+    VALUES ('delete', old.id, old.action_notes, old.request_details);
+END;
+
+CREATE TRIGGER IF NOT EXISTS repair_cases_fts_au
+AFTER UPDATE OF action_notes, request_details ON repair_cases BEGIN
+    INSERT INTO repair_cases_fts(repair_cases_fts, rowid, action_notes, request_details)
+    VALUES ('delete', old.id, old.action_notes, old.request_details);
+    INSERT INTO repair_cases_fts(rowid, action_notes, request_details)
+    VALUES (new.id, new.action_notes, new.request_details);
+END;
+"""
+
+
+def has_fts(conn: sqlite3.Connection) -> bool:
+    """repair_cases_fts 전문 검색 테이블 존재 여부."""
+    row = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'repair_cases_fts'"
+    ).fetchone()
+    return row is not None
+
+
 def init_db(conn: sqlite3.Connection | None = None):
     """모든 테이블 생성 (존재하지 않을 때만)."""
     with transaction(conn) as c:
         c.executescript(_SCHEMA_SQL)
 
+        # FTS 인덱스는 처음 만들 때 기존 케이스로 채운다
+        if not has_fts(c):
+            try:
+                c.executescript(_FTS_SQL)
+                c.execute("INSERT INTO repair_cases_fts(repair_cases_fts) VALUES ('rebuild')")
+            except sqlite3.OperationalError:
+                pass  # FTS5 미지원 — 키워드 검색은 Python 경로 사용
+        # 플래너 통계가 없으면 최초 1회 수집 (이후 갱신은 PRAGMA optimize가 담당)
+        has_stats = c.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'"
+        ).fetchone()
+        if not has_stats:
+            c.execute("ANALYZE")
+
 
 # ────────────────────────────────────────
 # 파일 메타 관련
 # ────────────────────────────────────────
 
+_SQL_FILE_EXISTS = "SELECT 1 FROM uploaded_files WHERE file_hash = ?"
+
+# DB 경로별 업로드 파일 해시 집합 — "없음" 판정만 신뢰하고 "있음"은 SQL로 확인
+_KNOWN_HASHES: dict[str, set[str]] = {}
+_HASHES_LOCK = threading.Lock()
+
+
+def _known_hashes(conn: sqlite3.Connection) -> set[str]:
+    key = getattr(conn, "db_path", "") or str(DB_PATH)
+    with _HASHES_LOCK:
+        hashes = _KNOWN_HASHES.get(key)
+        if hashes is None:
+            rows = conn.execute("SELECT file_hash FROM uploaded_files").fetchall()
+            hashes = _KNOWN_HASHES[key] = {r[0] for r in rows}
+    return hashes
+
+
 def file_exists(conn: sqlite3.Connection, file_hash: str) -> bool:
-    row = conn.execute(
-        "SELECT 1 FROM uploaded_files WHERE file_hash = ?", (file_hash,)
-    ).fetchone()
+    if file_hash not in _known_hashes(conn):
+        return False
+    row = conn.execute(_SQL_FILE_EXISTS, (file_hash,)).fetchone()
     return row is not None
 
 
@@ -172,6 +324,8 @@ def insert_file_record(conn: sqlite3.Connection, **kwargs) -> int:
            VALUES (:filename, :file_hash, :year_month, :sheet_name_data, :sheet_name_cost, :total_cost, :row_count)""",
         kwargs,
     )
+    # 롤백돼도 해시 집합은 "있음" 후보일 뿐이라 file_exists가 SQL로 재확인한다
+    _known_hashes(conn).add(kwargs["file_hash"])
     return cur.lastrowid
 
 
@@ -179,48 +333,105 @@ def insert_file_record(conn: sqlite3.Connection, **kwargs) -> int:
 # 케이스 관련
 # ────────────────────────────────────────
 
-def insert_cases_bulk(conn: sqlite3.Connection, file_id: int, cases: list[dict]):
-    rows = []
-    for c in cases:
-        extra = {k: v for k, v in c.items()
-                 if k not in ("row_number", "year_month", "product_group", "product",
-                              "action_notes", "request_details", "judgment_type", "amount")}
-        rows.append((
-            file_id,
-            c["row_number"],
-            c["year_month"],
-            c.get("product_group"),
-            c.get("product"),
-            c.get("action_notes"),
-            c.get("request_details"),
-            c.get("judgment_type"),
-            c.get("amount"),
-            json.dumps(extra, ensure_ascii=False) if extra else None,
-        ))
+# repair_cases 고정 컬럼 — 나머지 키는 extra_data(JSON)로 저장
+_RESERVED = frozenset((
+    "row_number", "year_month", "product_group", "product",
+    "action_notes", "request_details", "judgment_type", "amount",
+))
+
+
+def _json_dumps(data) -> str:
+    """JSON 직렬화 (orjson 설치 시 C 인코더 사용, numpy 값도 처리)."""
+    if HAS_ORJSON:
+        return orjson.dumps(
+            data, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY,
+        ).decode()
+    return json.dumps(data, ensure_ascii=False)
+
+
+def _json_loads(text: str | bytes):
+    return orjson.loads(text) if HAS_ORJSON else json.loads(text)
+
+
+def insert_cases_bulk(conn: sqlite3.Connection, file_id: int, cases: list[dict]) -> list[int]:
+    """케이스 일괄 삽입 후 새 케이스 id 목록(입력 순서)을 반환."""
+    def _rows():
+        for c in cases:
+            extra = {k: v for k, v in c.items() if k not in _RESERVED}
+            yield (
+                file_id,
+                c["row_number"],
+                c["year_month"],
+                c.get("product_group"),
+                c.get("product"),
+                c.get("action_notes"),
+                c.get("request_details"),
+                c.get("judgment_type"),
+                c.get("amount"),
+                _json_dumps(extra) if extra else None,
+            )
+
     conn.executemany(
         """INSERT INTO repair_cases
            (file_id, row_number, year_month, product_group, product,
             action_notes, request_details, judgment_type, amount, extra_data)
            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
-        rows,
+        _rows(),
     )
 
+    # executemany는 RETURNING을 지원하지 않으므로 file_id 인덱스로 한 번에 조회
+    cur = conn.execute(
+        "SELECT id FROM repair_cases WHERE file_id = ? ORDER BY id", (file_id,),
+    )
+    cur.arraysize = 1000
+    ids = []
+    while batch := cur.fetchmany():
+        ids.extend(r[0] for r in batch)
+    return ids
+
+
+_SQL_CASES_BY_MONTH = "SELECT * FROM repair_cases WHERE year_month = ? ORDER BY row_number"
+
 
 def get_cases_by_month(conn: sqlite3.Connection, year_month: str) -> list[dict]:
+    rows = conn.execute(_SQL_CASES_BY_MONTH, (year_month,)).fetchall()
+    return [dict(r) for r in rows]
+
+
+def get_cases_by_judgment(conn: sqlite3.Connection, year_month: str,
+                          keywords: list[str]) -> list[dict]:
+    """판정유형에 keywords 중 하나라도 포함된 해당 월 케이스만 조회."""
+    if not keywords:
+        return []
+    cond = " OR ".join("instr(judgment_type, ?) > 0" for _ in keywords)
     rows = conn.execute(
-        "SELECT * FROM repair_cases WHERE year_month = ? ORDER BY row_number",
-        (year_month,),
+        f"""SELECT * FROM repair_cases
+            WHERE year_month = ? AND ({cond})
+            ORDER BY row_number""",
+        [year_month, *keywords],
     ).fetchall()
     return [dict(r) for r in rows]
 
 
+def count_cases_by_months(conn: sqlite3.Connection, months: list[str]) -> dict[str, int]:
+    """월별 케이스 수 (단일 GROUP BY 쿼리)."""
+    if not months:
+        return {}
+    placeholders = ",".join("?" * len(months))
+    rows = conn.execute(
+        f"""SELECT year_month, COUNT(*) AS cnt FROM repair_cases
+            WHERE year_month IN ({placeholders})
+            GROUP BY year_month""",
+        list(months),
+    ).fetchall()
+    return {r["year_month"]: r["cnt"] for r in rows}
+
+
 def get_untagged_cases(conn: sqlite3.Connection, year_month: str) -> list[dict]:
     rows = conn.execute(
         """SELECT rc.* FROM repair_cases rc
-           WHERE rc.year_month = ?
-             AND rc.id NOT IN (
-                 SELECT case_id FROM case_tags WHERE is_final = 1
-             )
+           LEFT JOIN case_tags ct ON ct.case_id = rc.id AND ct.is_final = 1
+           WHERE rc.year_month = ? AND ct.case_id IS NULL
            ORDER BY rc.row_number""",
         (year_month,),
     ).fetchall()
@@ -240,14 +451,15 @@ def get_uploaded_months(conn: sqlite3.Connection) -> list[str]:
 
 def save_column_mapping(conn: sqlite3.Connection, mapping: dict[str, str],
                         mapping_name: str = "default"):
-    for key, col in mapping.items():
-        conn.execute(
+    """컬럼 매핑 일괄 저장. 진행 중인 트랜잭션이 있으면 그 안에서 실행한다."""
+    with transaction(conn) as c:
+        c.executemany(
             """INSERT INTO column_mappings (mapping_name, column_key, excel_column)
                VALUES (?, ?, ?)
                ON CONFLICT(mapping_name, column_key)
                DO UPDATE SET excel_column = excluded.excel_column,
                              updated_at = datetime('now','localtime')""",
-            (mapping_name, key, col),
+            [(mapping_name, key, col) for key, col in mapping.items()],
         )
 
 
@@ -264,11 +476,12 @@ def load_column_mapping(conn: sqlite3.Connection,
 # 태그 사전
 # ────────────────────────────────────────
 
+_SQL_TAGS_ACTIVE = "SELECT * FROM tag_dictionary WHERE is_active = 1 ORDER BY standard_tag"
+_SQL_TAGS_ALL = "SELECT * FROM tag_dictionary ORDER BY standard_tag"
+
+
 def get_all_tags(conn: sqlite3.Connection, active_only: bool = True) -> list[dict]:
-    sql = "SELECT * FROM tag_dictionary"
-    if active_only:
-        sql += " WHERE is_active = 1"
-    sql += " ORDER BY standard_tag"
+    sql = _SQL_TAGS_ACTIVE if active_only else _SQL_TAGS_ALL
     return [dict(r) for r in conn.execute(sql).fetchall()]
 
 
@@ -303,34 +516,61 @@ def get_all_synonyms(conn: sqlite3.Connection) -> dict[str, int]:
 # 케이스 태그
 # ────────────────────────────────────────
 
+_SQL_UPSERT_CASE_TAG = """
+    INSERT INTO case_tags (case_id, tag_id, source, confidence, ai_raw_text, is_final)
+    VALUES (?, ?, ?, ?, ?, ?)
+    ON CONFLICT(case_id, tag_id)
+    DO UPDATE SET source = excluded.source,
+                  confidence = excluded.confidence,
+                  ai_raw_text = excluded.ai_raw_text,
+                  is_final = excluded.is_final,
+                  confirmed_at = CASE WHEN excluded.is_final = 1
+                                      THEN datetime('now','localtime')
+                                      ELSE confirmed_at END
+"""
+
+
 def upsert_case_tag(conn: sqlite3.Connection, case_id: int, tag_id: int,
                     source: str, confidence: float | None = None,
                     ai_raw_text: str | None = None, is_final: bool = False):
     conn.execute(
-        """INSERT INTO case_tags (case_id, tag_id, source, confidence, ai_raw_text, is_final)
-           VALUES (?, ?, ?, ?, ?, ?)
-           ON CONFLICT(case_id, tag_id)
-           DO UPDATE SET source = excluded.source,
-                         confidence = excluded.confidence,
-                         ai_raw_text = excluded.ai_raw_text,
-                         is_final = excluded.is_final,
-                         confirmed_at = CASE WHEN excluded.is_final = 1
-                                             THEN datetime('now','localtime')
-                                             ELSE confirmed_at END""",
+        _SQL_UPSERT_CASE_TAG,
         (case_id, tag_id, source, confidence, ai_raw_text, int(is_final)),
     )
 
 
+_SQL_CASE_TAGS = """
+    SELECT ct.*, td.standard_tag, td.category
+    FROM case_tags ct
+    JOIN tag_dictionary td ON ct.tag_id = td.id
+    WHERE ct.case_id = ?
+    ORDER BY ct.confidence DESC
+"""
+
+
 def get_case_tags(conn: sqlite3.Connection, case_id: int) -> list[dict]:
+    rows = conn.execute(_SQL_CASE_TAGS, (case_id,)).fetchall()
+    return [dict(r) for r in rows]
+
+
+def get_case_tags_by_month(conn: sqlite3.Connection, year_month: str) -> dict[int, list[dict]]:
+    """해당 월 케이스별 태그 목록 {case_id: [태그 dict, ...]} (확신도 내림차순).
+
+    케이스마다 get_case_tags를 부르는 대신 한 번의 쿼리로 가져와 케이스별로 묶는다.
+    """
     rows = conn.execute(
         """SELECT ct.*, td.standard_tag, td.category
-           FROM case_tags ct
+           FROM repair_cases rc
+           JOIN case_tags ct ON ct.case_id = rc.id
            JOIN tag_dictionary td ON ct.tag_id = td.id
-           WHERE ct.case_id = ?
-           ORDER BY ct.confidence DESC""",
-        (case_id,),
+           WHERE rc.year_month = ?
+           ORDER BY ct.case_id, ct.confidence DESC""",
+        (year_month,),
     ).fetchall()
-    return [dict(r) for r in rows]
+    result: dict[int, list[dict]] = {}
+    for r in rows:
+        result.setdefault(r["case_id"], []).append(dict(r))
+    return result
 
 
 def get_tagged_cases_by_month(conn: sqlite3.Connection, year_month: str) -> list[dict]:
@@ -347,13 +587,39 @@ def get_tagged_cases_by_month(conn: sqlite3.Connection, year_month: str) -> list
     return [dict(r) for r in rows]
 
 
+def get_tagged_cases_df(conn: sqlite3.Connection,
+                        year_month: str | list[str]) -> pd.DataFrame:
+    """집계용 케이스×태그 행 (year_month, product_group, standard_tag) DataFrame.
+
+    year_month에 월 리스트를 넘기면 한 번의 IN 쿼리로 여러 달을 가져온다.
+    """
+    months = [year_month] if isinstance(year_month, str) else list(year_month)
+    placeholders = ",".join("?" * len(months))
+    return pd.read_sql_query(
+        f"""SELECT rc.year_month, rc.product_group, td.standard_tag
+            FROM repair_cases rc
+            JOIN case_tags ct ON rc.id = ct.case_id
+            JOIN tag_dictionary td ON ct.tag_id = td.id
+            WHERE rc.year_month IN ({placeholders})""",
+        conn,
+        params=months,
+    )
+
+
 # ────────────────────────────────────────
 # 스냅샷
 # ────────────────────────────────────────
 
+# 이보다 큰 스냅샷 JSON은 gzip 압축 BLOB으로 저장 (data_json 컬럼에 그대로 보관)
+_SNAPSHOT_GZIP_MIN_BYTES = 64 * 1024
+
+
 def save_snapshot(conn: sqlite3.Connection, year_month: str,
                   snapshot_type: str, data: dict,
                   total_cost: float | None = None, total_cases: int | None = None):
+    payload: str | bytes = _json_dumps(data)
+    if len(payload) >= _SNAPSHOT_GZIP_MIN_BYTES:
+        payload = gzip.compress(payload.encode(), compresslevel=6)
     conn.execute(
         """INSERT INTO monthly_snapshots (year_month, snapshot_type, data_json, total_cost, total_cases)
            VALUES (?, ?, ?, ?, ?)
@@ -362,7 +628,7 @@ def save_snapshot(conn: sqlite3.Connection, year_month: str,
                          total_cost = excluded.total_cost,
                          total_cases = excluded.total_cases,
                          computed_at = datetime('now','localtime')""",
-        (year_month, snapshot_type, json.dumps(data, ensure_ascii=False), total_cost, total_cases),
+        (year_month, snapshot_type, payload, total_cost, total_cases),
     )
 
 
@@ -373,7 +639,10 @@ def load_snapshot(conn: sqlite3.Connection, year_month: str,
         (year_month, snapshot_type),
     ).fetchone()
     if row:
-        return json.loads(row["data_json"])
+        payload = row["data_json"]
+        if isinstance(payload, bytes):
+            payload = gzip.decompress(payload)
+        return _json_loads(payload)
     return None
 
 
@@ -408,11 +677,13 @@ def get_pending_candidates(conn: sqlite3.Connection) -> list[dict]:
 # 편집 이력
 # ────────────────────────────────────────
 
+_SQL_RECORD_EDIT = """
+    INSERT INTO tag_edit_history (case_id, old_tag_id, new_tag_id, action)
+    VALUES (?, ?, ?, ?)
+"""
+
+
 def record_edit(conn: sqlite3.Connection, case_id: int,
                 new_tag_id: int, action: str,
                 old_tag_id: int | None = None):
-    conn.execute(
-        """INSERT INTO tag_edit_history (case_id, old_tag_id, new_tag_id, action)
-           VALUES (?, ?, ?, ?)""",
-        (case_id, old_tag_id, new_tag_id, action),
-    )
+    conn.execute(_SQL_RECORD_EDIT, (case_id, old_tag_id, new_tag_id, action))
@@ -1,18 +1,76 @@
 """엑셀 파일 파싱 — 시트 감지, 헤더 추출, 데이터 파싱."""
 
+import datetime as dt
+import math
+import os
 import re
+import threading
+import zipfile
+from collections import OrderedDict
+from contextlib import contextmanager
 from pathlib import Path
+from xml.etree import ElementTree
 
 import openpyxl
-import pandas as pd
+from openpyxl import Workbook
+
+try:
+    from python_calamine import CalamineError, CalamineWorkbook
+    HAS_CALAMINE = True
+except ImportError:
+    HAS_CALAMINE = False
+
+from config import EXCEL_USE_CALAMINE
+
+# pandas.read_excel 엔진 (python-calamine 설치 시 Rust 파서)
+PANDAS_EXCEL_ENGINE = "calamine" if HAS_CALAMINE and EXCEL_USE_CALAMINE else "openpyxl"
 
 
 # ── 시트 감지 패턴 ──
-_MONTH_PATTERN = re.compile(r"^(\d{1,2})월$")                        # '1월', '12월'
-_COST_PATTERN = re.compile(r"^(\d{1,2})월\s*하자보수비\s*금액$")      # '1월 하자보수비 금액'
+# '1월' → 데이터 시트, '1월 하자보수비 금액' → 비용 시트 (2번 그룹 유무로 구분)
+_SHEET_PATTERN = re.compile(r"(\d{1,2})월(\s*하자보수비\s*금액)?")
+_FILENAME_YM_PATTERN = re.compile(r"(\d{2})년\s*(\d{1,2})월")
+_SHEET_TAG = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}sheet"
+
+# ── 열린 워크북 캐시: (경로, 수정시각, 크기) → read-only Workbook / calamine 워크북 ──
+_WB_CACHE: OrderedDict[tuple, Workbook] = OrderedDict()
+_CALAMINE_CACHE: OrderedDict[tuple, tuple] = OrderedDict()  # key → (CalamineWorkbook, {시트명: CalamineSheet})
+_WB_CACHE_SIZE = 4
+_WB_LOCK = threading.Lock()
+
 
+def _file_key(source: str | Path) -> tuple:
+    path = os.path.abspath(source)
+    stat = os.stat(path)
+    return path, stat.st_mtime_ns, stat.st_size
+
+
+@contextmanager
+def opened_workbook(source: str | Path | Workbook):
+    """read-only 워크북을 연다. 같은 파일(경로·수정시각·크기)은 열린 워크북을 재사용.
+
+    이미 열린 Workbook을 넘기면 그대로 사용한다. 캐시된 워크북은 여기서 닫지 않는다.
+    """
+    if isinstance(source, Workbook):
+        yield source
+        return
 
-def detect_sheets(filepath: str | Path) -> dict:
+    key = _file_key(source)
+    with _WB_LOCK:
+        wb = _WB_CACHE.get(key)
+        if wb is not None:
+            _WB_CACHE.move_to_end(key)
+        else:
+            wb = openpyxl.load_workbook(
+                key[0], read_only=True, data_only=True, keep_links=False,
+            )
+            _WB_CACHE[key] = wb
+            if len(_WB_CACHE) > _WB_CACHE_SIZE:
+                _WB_CACHE.popitem(last=False)[1].close()
+    yield wb
+
+
+def detect_sheets(filepath: str | Path | Workbook) -> dict:
     """엑셀 파일의 시트 목록을 분석하여 데이터/비용 시트를 식별한다.
 
     Returns:
@@ -22,32 +80,101 @@ def detect_sheets(filepath: str | Path) -> dict:
             "cost_sheets": [{"name": "1월 하자보수비 금액", "month": 1}, ...],
         }
     """
-    wb = openpyxl.load_workbook(str(filepath), read_only=True, data_only=True)
-    result = {"all_sheets": wb.sheetnames, "data_sheets": [], "cost_sheets": []}
-    for name in wb.sheetnames:
-        m = _MONTH_PATTERN.match(name.strip())
-        if m:
-            result["data_sheets"].append({"name": name, "month": int(m.group(1))})
+    sheetnames = _sheet_names(filepath)
+    result = {"all_sheets": sheetnames, "data_sheets": [], "cost_sheets": []}
+    for name in sheetnames:
+        m = _SHEET_PATTERN.fullmatch(name.strip())
+        if not m:
             continue
-        m = _COST_PATTERN.match(name.strip())
-        if m:
-            result["cost_sheets"].append({"name": name, "month": int(m.group(1))})
-    wb.close()
+        kind = "cost_sheets" if m.group(2) else "data_sheets"
+        result[kind].append({"name": name, "month": int(m.group(1))})
     return result
 
 
-def extract_headers(filepath: str | Path, sheet_name: str) -> list[str]:
+def _sheet_names(source: str | Path | Workbook) -> list[str]:
+    """시트 이름 목록. 파일이면 xl/workbook.xml만 읽어 워크북을 열지 않는다."""
+    if not isinstance(source, Workbook):
+        try:
+            with zipfile.ZipFile(source) as zf, zf.open("xl/workbook.xml") as f:
+                return [
+                    el.get("name")
+                    for _, el in ElementTree.iterparse(f)
+                    if el.tag == _SHEET_TAG
+                ]
+        except (zipfile.BadZipFile, KeyError, ElementTree.ParseError):
+            pass  # 비표준 파일(.xls 등)은 calamine/openpyxl에 맡긴다
+        if _use_calamine(source):
+            try:
+                return CalamineWorkbook.from_path(str(source)).sheet_names
+            except CalamineError:
+                pass
+    with opened_workbook(source) as wb:
+        return wb.sheetnames
+
+
+def _calamine_sheet(source: str | Path, sheet_name: str):
+    """calamine 시트. 같은 파일(경로·수정시각·크기)은 워크북과 이미 읽은 시트를 재사용."""
+    key = _file_key(source)
+    with _WB_LOCK:
+        entry = _CALAMINE_CACHE.get(key)
+        if entry is not None:
+            _CALAMINE_CACHE.move_to_end(key)
+        else:
+            entry = (CalamineWorkbook.from_path(key[0]), {})
+            _CALAMINE_CACHE[key] = entry
+            if len(_CALAMINE_CACHE) > _WB_CACHE_SIZE:
+                _CALAMINE_CACHE.popitem(last=False)
+        wb, sheets = entry
+        sheet = sheets.get(sheet_name)
+        if sheet is None:
+            sheet = sheets[sheet_name] = wb.get_sheet_by_name(sheet_name)
+    return sheet
+
+
+def _use_calamine(source) -> bool:
+    return HAS_CALAMINE and EXCEL_USE_CALAMINE and not isinstance(source, Workbook)
+
+
+def _calamine_cell(val):
+    """calamine 셀 값을 openpyxl 표현에 맞춘다 (빈 셀 → None, 정수형 실수 → int, 날짜 → datetime)."""
+    if val == "":
+        return None
+    if isinstance(val, float) and val.is_integer():
+        return int(val)
+    if type(val) is dt.date:
+        return dt.datetime.combine(val, dt.time())
+    return val
+
+
+def _iter_rows(source: str | Path | Workbook, sheet_name: str):
+    """시트의 행 값 튜플을 1행부터 순서대로 반환.
+
+    EXCEL_USE_CALAMINE이 켜져 있고 python-calamine이 설치돼 있으면 Rust 파서로 읽고,
+    calamine이 읽지 못하는 파일은 openpyxl read-only로 대체한다.
+    """
+    if _use_calamine(source):
+        try:
+            sheet = _calamine_sheet(source, sheet_name)
+        except CalamineError:
+            sheet = None
+        if sheet is not None:
+            # iter_rows는 1행부터 주지만 첫 사용 열 앞의 빈 열은 빼므로 채워 넣는다
+            lead = (None,) * sheet.start[1] if sheet.start else ()
+            for row in sheet.iter_rows():
+                yield lead + tuple(_calamine_cell(v) for v in row)
+            return
+
+    with opened_workbook(source) as wb:
+        yield from wb[sheet_name].iter_rows(values_only=True)
+
+
+def extract_headers(filepath: str | Path | Workbook, sheet_name: str) -> list[str]:
     """지정 시트의 헤더(1행) 컬럼명 리스트 반환."""
-    wb = openpyxl.load_workbook(str(filepath), read_only=True, data_only=True)
-    ws = wb[sheet_name]
-    headers = []
-    for cell in next(ws.iter_rows(min_row=1, max_row=1)):
-        headers.append(str(cell.value).strip() if cell.value is not None else "")
-    wb.close()
-    return headers
+    row = next(_iter_rows(filepath, sheet_name), ())
+    return [str(v).strip() if v is not None else "" for v in row]
 
 
-def parse_data_sheet(filepath: str | Path, sheet_name: str,
+def parse_data_sheet(filepath: str | Path | Workbook, sheet_name: str,
                      column_mapping: dict[str, str]) -> list[dict]:
     """데이터 시트를 파싱하여 매핑된 컬럼 기준의 딕셔너리 리스트 반환.
 
@@ -57,17 +184,38 @@ def parse_data_sheet(filepath: str | Path, sheet_name: str,
     Returns:
         [{"row_number": 2, "product_group": "...", ...}, ...]
     """
-    df = pd.read_excel(str(filepath), sheet_name=sheet_name, engine="openpyxl")
+    rows = _iter_rows(filepath, sheet_name)
+    header_row = next(rows, ())
 
-    # 역매핑: 엑셀컬럼명 → 내부키
-    reverse_map = {v: k for k, v in column_mapping.items() if v in df.columns}
+    # 헤더: extract_headers와 같이 공백 제거, 빈 헤더/중복 헤더는 pandas 규칙으로 명명
+    headers = []
+    seen: dict[str, int] = {}
+    for i, h in enumerate(header_row):
+        name = str(h).strip() if h is not None else ""
+        if not name:
+            name = f"Unnamed: {i}"
+        if name in seen:
+            seen[name] += 1
+            name = f"{name}.{seen[name]}"
+        else:
+            seen[name] = 0
+        headers.append(name)
+    n_cols = len(headers)
+
+    # 역매핑: 열 위치 → 내부키 (매핑되지 않은 열은 extra로 보관)
+    reverse_map = {v: k for k, v in column_mapping.items()}
+    mapped = [(i, reverse_map[h]) for i, h in enumerate(headers) if h in reverse_map]
+    mapped_idx = {i for i, _ in mapped}
+    extra_cols = [(i, h) for i, h in enumerate(headers) if i not in mapped_idx]
 
     records = []
-    for idx, row in df.iterrows():
-        rec = {"row_number": idx + 2}  # 엑셀 행 번호 (1행=헤더)
-        for excel_col, internal_key in reverse_map.items():
-            val = row.get(excel_col)
-            if pd.isna(val):
+    pending_blank = []  # 끝부분 빈 행은 버리기 위해 보류
+    for row_number, row in enumerate(rows, start=2):  # 엑셀 행 번호 (1행=헤더)
+        row = tuple(row[:n_cols]) + (None,) * (n_cols - len(row))
+        rec = {"row_number": row_number}
+        for i, internal_key in mapped:
+            val = row[i]
+            if val is None or val == "":
                 val = None
             elif internal_key == "amount":
                 try:
@@ -75,53 +223,83 @@ def parse_data_sheet(filepath: str | Path, sheet_name: str,
                 except (ValueError, TypeError):
                     val = None
             else:
-                val = str(val).strip() if val is not None else None
+                val = str(val).strip()
             rec[internal_key] = val
 
-        # 매핑되지 않은 컬럼도 extra로 보관
-        mapped_cols = set(reverse_map.keys())
-        for col in df.columns:
-            if col not in mapped_cols and not pd.isna(row.get(col)):
-                val = row.get(col)
-                if not pd.isna(val):
-                    rec[col] = str(val) if not isinstance(val, (int, float)) else val
+        for i, col in extra_cols:
+            val = row[i]
+            if val is not None and val != "":
+                rec[col] = str(val) if not isinstance(val, (int, float)) else val
 
+        if all(v is None or v == "" for v in row):
+            pending_blank.append(rec)
+            continue
+        records.extend(pending_blank)
+        pending_blank.clear()
         records.append(rec)
 
     return records
 
 
-def parse_cost_sheet(filepath: str | Path, sheet_name: str,
+def _to_number(val) -> float | None:
+    """숫자 또는 숫자 문자열을 float로 (그 외는 None)."""
+    if isinstance(val, bool):
+        return None
+    if isinstance(val, (int, float)):
+        num = float(val)
+    elif isinstance(val, str):
+        try:
+            num = float(val.strip())
+        except ValueError:
+            return None
+    else:
+        return None
+    return None if math.isnan(num) else num
+
+
+def parse_cost_sheet(filepath: str | Path | Workbook, sheet_name: str,
                      total_column: str = "전 체") -> float | None:
     """비용 시트에서 '전 체' 컬럼의 합계 값을 추출.
 
     비용 시트는 보통 소수 행만 있으며, 마지막(또는 첫) 데이터 행의 합계를 반환.
     """
-    df = pd.read_excel(str(filepath), sheet_name=sheet_name, engine="openpyxl")
+    rows = list(_iter_rows(filepath, sheet_name))
+    if not rows:
+        return None
+    header, body = rows[0], rows[1:]
 
     # 컬럼명에 공백이 있을 수 있으므로 유연하게 매칭
-    target_col = None
-    for col in df.columns:
-        cleaned = str(col).replace(" ", "").strip()
-        if cleaned == total_column.replace(" ", ""):
-            target_col = col
+    target = total_column.replace(" ", "")
+    target_idx = None
+    for i, col in enumerate(header):
+        if col is not None and str(col).replace(" ", "").strip() == target:
+            target_idx = i
             break
 
-    if target_col is None:
-        # 마지막 컬럼을 시도
-        target_col = df.columns[-1]
+    if target_idx is None:
+        # 마지막 컬럼을 시도 (값이 있는 마지막 열)
+        widths = [
+            max((i + 1 for i, v in enumerate(r) if v is not None), default=0)
+            for r in rows
+        ]
+        target_idx = max(widths) - 1
+        if target_idx < 0:
+            return None
 
     # 숫자 값 중 가장 큰 값 (합계일 가능성 높음)
-    values = pd.to_numeric(df[target_col], errors="coerce").dropna()
-    if values.empty:
+    values = [
+        num for r in body
+        if target_idx < len(r) and (num := _to_number(r[target_idx])) is not None
+    ]
+    if not values:
         return None
 
-    return float(values.max())
+    return max(values)
 
 
 def get_year_month_from_filename(filename: str) -> str | None:
     """파일명에서 연-월 정보 추출. 예: '하자보수비(브랜드)_26년01월 1.xlsx' → '2026-01'"""
-    m = re.search(r"(\d{2})년\s*(\d{1,2})월", filename)
+    m = _FILENAME_YM_PATTERN.search(filename)
     if m:
         year = int(m.group(1))
         month = int(m.group(2))
@@ -0,0 +1,73 @@
+"""파싱된 DataFrame의 Parquet 캐시 — 같은 엑셀을 다시 올리면 XML 파싱 없이 읽는다.
+
+키는 파일 내용의 blake2b 해시 + 파싱 인자. pyarrow가 없거나 저장할 수 없는 프레임(혼합 타입 컬럼 등)은
+캐시하지 않고 매번 파싱한다.
+"""
+
+import hashlib
+from pathlib import Path
+from typing import BinaryIO
+
+import pandas as pd
+
+try:
+    import pyarrow  # noqa: F401  (pandas Parquet 엔진)
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+from config import EXCEL_CACHE_DIR
+
+# 파싱 로직이 바뀌면 올려서 이전 캐시를 무효화
+CACHE_VERSION = 2
+
+
+def _file_bytes(file: str | Path | BinaryIO) -> bytes:
+    if isinstance(file, (str, Path)):
+        return Path(file).read_bytes()
+    if hasattr(file, "getvalue"):  # BytesIO, Streamlit UploadedFile
+        return file.getvalue()
+    pos = file.tell()
+    data = file.read()
+    file.seek(pos)
+    return data
+
+
+def make_key(file: str | Path | BinaryIO, *parts) -> str | None:
+    """파일 내용과 파싱 인자로 캐시 키 생성 (pyarrow가 없거나 읽을 수 없으면 None)."""
+    if not HAS_PYARROW:
+        return None
+    try:
+        data = _file_bytes(file)
+    except (OSError, AttributeError):
+        return None
+    h = hashlib.blake2b(data, digest_size=16)
+    h.update(repr((CACHE_VERSION, *parts)).encode("utf-8"))
+    return h.hexdigest()
+
+
+def load(key: str | None) -> pd.DataFrame | None:
+    """캐시된 DataFrame (없으면 None)."""
+    if key is None:
+        return None
+    path = EXCEL_CACHE_DIR / f"{key}.parquet"
+    if not path.exists():
+        return None
+    try:
+        return pd.read_parquet(path)
+    except Exception:
+        return None
+
+
+def save(key: str | None, df: pd.DataFrame) -> None:
+    """DataFrame 저장. 실패해도 무시한다 (다음에 다시 파싱)."""
+    if key is None:
+        return
+    path = EXCEL_CACHE_DIR / f"{key}.parquet"
+    tmp = path.with_suffix(".tmp")
+    try:
+        EXCEL_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        df.to_parquet(tmp, compression="zstd")
+        tmp.replace(path)
+    except Exception:
+        tmp.unlink(missing_ok=True)
@@ -1,8 +1,8 @@
 """사용자 스타일 학습 — 피드백 기반 추천 개선."""
 
-from core.database import get_connection, add_synonym, get_all_tags, get_all_synonyms
+from core.database import get_connection, add_synonym, get_all_tags, get_all_synonyms, has_fts
 from core.tag_engine import find_matching_tag
-from utils.korean_utils import normalize_text
+from utils.korean_utils import normalize_text, keyword_set
 
 
 def build_training_pairs(conn, year_month: str | None = None) -> list[dict]:
@@ -69,35 +69,50 @@ def get_similar_past_cases(conn, case: dict, top_n: int = 3) -> list[dict]:
     if not action:
         return []
 
+    target_kw = keyword_set(action)
+    if not target_kw:
+        return []
+
     # 같은 품목군에서 확정된 케이스 중 가장 유사한 것
-    sql = """
-        SELECT rc.action_notes, rc.request_details, rc.product_group,
-               td.standard_tag
-        FROM case_tags ct
-        JOIN repair_cases rc ON ct.case_id = rc.id
-        JOIN tag_dictionary td ON ct.tag_id = td.id
-        WHERE ct.is_final = 1 AND rc.id != ?
-    """
-    params = [case.get("id", 0)]
+    if has_fts(conn):
+        # 전문 검색 인덱스로 키워드가 겹치는 후보만 관련도 순으로 가져온다
+        sql = """
+            SELECT rc.action_notes, rc.request_details, rc.product_group,
+                   td.standard_tag
+            FROM repair_cases_fts f
+            JOIN repair_cases rc ON rc.id = f.rowid
+            JOIN case_tags ct ON ct.case_id = rc.id
+            JOIN tag_dictionary td ON ct.tag_id = td.id
+            WHERE repair_cases_fts MATCH ? AND ct.is_final = 1 AND rc.id != ?
+        """
+        params = [" OR ".join(f'"{kw}"*' for kw in target_kw), case.get("id", 0)]
+        order = " ORDER BY bm25(repair_cases_fts)"
+    else:
+        sql = """
+            SELECT rc.action_notes, rc.request_details, rc.product_group,
+                   td.standard_tag
+            FROM case_tags ct
+            JOIN repair_cases rc ON ct.case_id = rc.id
+            JOIN tag_dictionary td ON ct.tag_id = td.id
+            WHERE ct.is_final = 1 AND rc.id != ?
+        """
+        params = [case.get("id", 0)]
+        order = " ORDER BY rc.created_at DESC"
 
     if product:
         sql += " AND rc.product_group = ?"
         params.append(product)
 
-    sql += " ORDER BY rc.created_at DESC LIMIT ?"
+    sql += order + " LIMIT ?"
     params.append(top_n * 5)  # 후보를 넉넉히 가져와서 필터링
 
     rows = conn.execute(sql, params).fetchall()
 
     # 간단한 유사도: 공통 키워드 수
-    from utils.korean_utils import extract_keywords
-    target_kw = set(extract_keywords(action))
-
     scored = []
     for r in rows:
         past_text = f"{r['action_notes'] or ''} {r['request_details'] or ''}"
-        past_kw = set(extract_keywords(past_text))
-        overlap = len(target_kw & past_kw)
+        overlap = len(target_kw & keyword_set(past_text))
         if overlap > 0:
             scored.append((overlap, dict(r)))
 
@@ -1,23 +1,44 @@
 """Claude API 래퍼 — 원인 추출, 보고서 생성."""
 
+import asyncio
+import functools
+import hashlib
 import os
+import queue
+import random
+import re
+import string
+import threading
 import time
 import json
+from datetime import datetime
 
 import anthropic
+import httpx
 from dotenv import load_dotenv
 
-from config import ANTHROPIC_MODEL, BATCH_SIZE
+from config import (
+    ANTHROPIC_MODEL, BATCH_SIZE, LLM_MAX_CONCURRENCY, SCANNER_EXTRACT_BATCH,
+    SEMANTIC_CACHE_TEXT_CHARS, LLM_REQUESTS_PER_MINUTE,
+)
+from core import response_cache, semantic_cache
+from core.response_cache import cached_llm
+from core.prompt_trim import trim_page_content
 from prompts.cause_extraction import (
-    SYSTEM_PROMPT, BATCH_TEMPLATE, CASE_ITEM_TEMPLATE, EXTRACTION_TOOL,
+    SYSTEM_PROMPT, TAG_DICTIONARY_TEMPLATE, BATCH_TEMPLATE, CASE_ITEM_TEMPLATE,
+    EXTRACTION_TOOL,
 )
 from prompts.report_writing import REPORT_SYSTEM, REPORT_USER_TEMPLATE, REPORT_TOOL
 from prompts.product_extraction import (
     SYSTEM_PROMPT as PRODUCT_SYSTEM,
     USER_TEMPLATE as PRODUCT_USER_TEMPLATE,
     EXTRACTION_TOOL as PRODUCT_TOOL,
+    BATCH_USER_TEMPLATE as PRODUCT_BATCH_USER_TEMPLATE,
+    BATCH_ITEM_TEMPLATE as PRODUCT_BATCH_ITEM_TEMPLATE,
+    BATCH_EXTRACTION_TOOL as PRODUCT_BATCH_TOOL,
     COMPARISON_SYSTEM,
     COMPARISON_USER_TEMPLATE,
+    COMPARISON_ITEM_TEMPLATE,
     COMPARISON_TOOL,
 )
 from prompts.spec_analysis import (
@@ -29,11 +50,137 @@ from prompts.spec_analysis import (
 
 load_dotenv()
 
-MAX_RETRIES = 3
-RETRY_DELAYS = [1, 3, 10]
 
+def _compile_template(template: str):
+    """str.format 템플릿을 (리터럴, 필드, 서식) 조각으로 미리 분해해 렌더 함수로 만든다.
 
-def _get_client() -> anthropic.Anthropic:
+    호출마다 '{...}' 토큰을 다시 파싱하지 않는다. 사용하지 않는 키워드 인자는 무시 (str.format과 같음).
+    """
+    parts = []
+    for literal, field, spec, conversion in string.Formatter().parse(template):
+        if field is not None and (not field.isidentifier() or conversion or "{" in spec):
+            raise ValueError(f"지원하지 않는 템플릿 필드: {{{field}}}")
+        parts.append((literal, field, spec or ""))
+    parts = tuple(parts)
+
+    def render(**values) -> str:
+        out = []
+        for literal, field, spec in parts:
+            out.append(literal)
+            if field is not None:
+                out.append(format(values[field], spec))
+        return "".join(out)
+
+    return render
+
+
+_render_tag_dictionary_block = _compile_template(TAG_DICTIONARY_TEMPLATE)
+_render_case_item = _compile_template(CASE_ITEM_TEMPLATE)
+_render_cause_batch = _compile_template(BATCH_TEMPLATE)
+_render_report_user = _compile_template(REPORT_USER_TEMPLATE)
+_render_product_user = _compile_template(PRODUCT_USER_TEMPLATE)
+_render_product_batch_item = _compile_template(PRODUCT_BATCH_ITEM_TEMPLATE)
+_render_product_batch_user = _compile_template(PRODUCT_BATCH_USER_TEMPLATE)
+_render_comparison_user = _compile_template(COMPARISON_USER_TEMPLATE)
+_render_comparison_item = _compile_template(COMPARISON_ITEM_TEMPLATE)
+_render_spec_user = _compile_template(SPEC_USER_TEMPLATE)
+_render_spec_our_product = _compile_template(SPEC_OUR_PRODUCT_TEMPLATE)
+
+MAX_RETRIES = 5
+RETRY_BASE_DELAY = 0.1      # 지수 백오프 시작값 (초)
+RETRY_MAX_DELAY = 30.0
+RATE_LIMIT_TOKEN_RESERVE = 0.1     # 남은 토큰이 한도의 이 비율 미만이면 리셋까지 대기
+
+
+class _RateLimiter:
+    """분당 요청 수 제한 (토큰 버킷, GCRA 방식). 스레드·이벤트 루프 간 공유 가능.
+
+    reserve()는 다음 요청을 보내기 전 기다려야 할 시간(초)을 돌려준다.
+    observe(headers)로 응답의 anthropic-ratelimit-* 헤더를 반영하면, 남은 한도가 적을 때
+    429를 받기 전에 미리 속도를 늦춘다.
+    """
+
+    def __init__(self, per_minute: int, burst: int):
+        self._interval = 60.0 / per_minute
+        self._burst = burst
+        self._burst_window = self._interval * (burst - 1)
+        self._tat = 0.0     # 이론상 다음 도착 시각
+        self._requests_remaining: int | None = None
+        self._requests_reset = 0.0      # time.monotonic() 기준
+        self._tokens_low = False
+        self._tokens_reset = 0.0
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        with self._lock:
+            now = time.monotonic()
+            tat = max(self._tat, now)
+            wait = max(0.0, tat - now - self._burst_window)
+            self._tat = tat + self._interval
+
+            # 헤더로 알려진 남은 요청 수가 동시 요청 수보다 적으면 리셋까지 남은 시간을 나눠 대기
+            if self._requests_remaining is not None and self._requests_reset > now:
+                if self._requests_remaining < self._burst:
+                    wait = max(wait, (self._requests_reset - now) / max(1, self._requests_remaining))
+                self._requests_remaining -= 1
+            # 토큰 한도가 거의 찼으면 리셋 시각까지 대기
+            if self._tokens_low and self._tokens_reset > now:
+                wait = max(wait, self._tokens_reset - now)
+            return wait
+
+    def observe(self, headers) -> None:
+        """응답 헤더의 요청·토큰 한도 상태를 반영."""
+        requests_limit = _header_int(headers, "anthropic-ratelimit-requests-limit")
+        requests_remaining = _header_int(headers, "anthropic-ratelimit-requests-remaining")
+        requests_reset = _header_reset(headers, "anthropic-ratelimit-requests-reset")
+        tokens_limit = _header_int(headers, "anthropic-ratelimit-tokens-limit")
+        tokens_remaining = _header_int(headers, "anthropic-ratelimit-tokens-remaining")
+        tokens_reset = _header_reset(headers, "anthropic-ratelimit-tokens-reset")
+        with self._lock:
+            # 조직 한도가 설정값보다 낮으면 그에 맞춰 간격을 늘린다
+            if requests_limit and 60.0 / requests_limit > self._interval:
+                self._interval = 60.0 / requests_limit
+                self._burst_window = self._interval * (self._burst - 1)
+            if requests_remaining is not None and requests_reset is not None:
+                self._requests_remaining = requests_remaining
+                self._requests_reset = requests_reset
+            if tokens_limit and tokens_remaining is not None and tokens_reset is not None:
+                self._tokens_low = tokens_remaining < tokens_limit * RATE_LIMIT_TOKEN_RESERVE
+                self._tokens_reset = tokens_reset
+
+
+def _header_int(headers, name: str) -> int | None:
+    try:
+        return int(headers[name])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def _header_reset(headers, name: str) -> float | None:
+    """RFC 3339 리셋 시각 헤더를 time.monotonic() 기준 값으로."""
+    try:
+        reset_at = datetime.fromisoformat(headers[name]).timestamp()
+    except (KeyError, TypeError, ValueError):
+        return None
+    return time.monotonic() + (reset_at - time.time())
+
+
+_RATE_LIMITER = _RateLimiter(LLM_REQUESTS_PER_MINUTE, burst=LLM_MAX_CONCURRENCY)
+
+
+def _retry_delay(attempt: int, error: anthropic.APIStatusError) -> float:
+    """재시도 대기 시간. retry-after 헤더가 있으면 따르고, 없으면 지터를 섞은 지수 백오프."""
+    retry_after = error.response.headers.get("retry-after")
+    if retry_after:
+        try:
+            return float(retry_after)
+        except ValueError:
+            pass
+    delay = min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** attempt)
+    return delay * random.uniform(0.5, 1.5)
+
+
+def _get_api_key() -> str:
     # Streamlit Cloud secrets 우선, 없으면 환경변수
     api_key = ""
     try:
@@ -48,69 +195,297 @@ def _get_client() -> anthropic.Anthropic:
             "ANTHROPIC_API_KEY가 설정되지 않았습니다. "
             ".env 파일 또는 Streamlit secrets에 API 키를 입력하세요."
         )
-    return anthropic.Anthropic(api_key=api_key)
+    return api_key
+
+
+_EPHEMERAL = {"type": "ephemeral"}
+
+
+def _system_blocks(*texts: str) -> list[dict]:
+    """system 텍스트 블록 리스트. 블록마다 cache_control을 달아 프롬프트 캐시를 쓴다.
+
+    캐시는 tools → system 순서의 접두사 단위이므로 앞 블록이 같으면
+    뒤 블록이 바뀌어도 앞부분까지는 캐시가 재사용된다.
+    """
+    return [
+        {"type": "text", "text": _canonicalize(t), "cache_control": _EPHEMERAL}
+        for t in texts
+    ]
+
+
+def _canonicalize(text: str) -> str:
+    """줄바꿈을 \\n으로 통일하고 줄 끝 공백 제거 — 같은 내용이면 바이트 단위로 같은 프롬프트."""
+    lines = text.replace("\r\n", "\n").replace("\r", "\n").split("\n")
+    return "\n".join(line.rstrip() for line in lines)
+
+
+@functools.lru_cache(maxsize=32)
+def _render_tag_dictionary(tags: tuple[str, ...]) -> str:
+    """태그 사전 블록. 공백 정규화·중복 제거·정렬해 전달 순서가 달라도 같은 접두사가 되게 한다."""
+    canonical = sorted({" ".join(t.split()) for t in tags} - {""})
+    body = "\n".join(f"- {t}" for t in canonical) if canonical else "(태그 사전 비어있음)"
+    return _render_tag_dictionary_block(tag_dictionary=body)
+
+
+@functools.lru_cache(maxsize=1)
+def _get_client() -> anthropic.Anthropic:
+    """공유 동기 클라이언트 (HTTP 연결 풀 재사용)."""
+    return anthropic.Anthropic(api_key=_get_api_key())
+
+
+@functools.lru_cache(maxsize=1)
+def _async_client() -> anthropic.AsyncAnthropic:
+    """공유 비동기 클라이언트. 항상 _background_loop()에서만 사용한다 (연결이 루프에 묶임)."""
+    return anthropic.AsyncAnthropic(
+        api_key=_get_api_key(),
+        http_client=anthropic.DefaultAsyncHttpxClient(
+            limits=httpx.Limits(max_connections=64, max_keepalive_connections=32),
+        ),
+    )
 
 
 def _call_with_retry(func, *args, **kwargs):
     for attempt in range(MAX_RETRIES):
+        time.sleep(_RATE_LIMITER.reserve())
         try:
             return func(*args, **kwargs)
-        except anthropic.RateLimitError:
+        except anthropic.RateLimitError as e:
+            _RATE_LIMITER.observe(e.response.headers)
             if attempt < MAX_RETRIES - 1:
-                time.sleep(RETRY_DELAYS[attempt])
+                time.sleep(_retry_delay(attempt, e))
             else:
                 raise
         except anthropic.APIError:
             raise
 
 
-def extract_causes_batch(cases: list[dict], tag_dictionary: list[str]) -> list[dict]:
+async def _acall_with_retry(func, *args, **kwargs):
+    """_call_with_retry의 비동기 버전 (대기 중 다른 요청은 계속 진행)."""
+    for attempt in range(MAX_RETRIES):
+        await asyncio.sleep(_RATE_LIMITER.reserve())
+        try:
+            return await func(*args, **kwargs)
+        except anthropic.RateLimitError as e:
+            _RATE_LIMITER.observe(e.response.headers)
+            if attempt < MAX_RETRIES - 1:
+                await asyncio.sleep(_retry_delay(attempt, e))
+            else:
+                raise
+        except anthropic.APIError:
+            raise
+
+
+def _tool_request(tool: dict, system: list[dict], user_message: str,
+                  max_tokens: int) -> dict:
+    """도구 사용을 강제하는 messages.create 인자."""
+    return {
+        "model": ANTHROPIC_MODEL,
+        "max_tokens": max_tokens,
+        "system": system,
+        "messages": [{"role": "user", "content": user_message}],
+        "tools": [tool],
+        "tool_choice": {"type": "tool", "name": tool["name"]},
+    }
+
+
+def _tool_use_input(content, tool_name: str) -> dict | None:
+    """응답 content 블록 중 지정한 도구의 입력 dict (없으면 None)."""
+    return next(
+        (b.input for b in content if b.type == "tool_use" and b.name == tool_name),
+        None,
+    )
+
+
+def _invoke_tool(request: dict) -> dict | None:
+    """동기 호출로 도구 입력 dict 반환 (속도 제한 시 재시도)."""
+    raw = _call_with_retry(_get_client().messages.with_raw_response.create, **request)
+    _RATE_LIMITER.observe(raw.headers)
+    return _tool_use_input(raw.parse().content, request["tool_choice"]["name"])
+
+
+async def _stream_tool_input(client: anthropic.AsyncAnthropic, request: dict,
+                             on_partial=None) -> dict | None:
+    """스트리밍으로 호출해 지정한 도구(tool_choice)의 입력 dict를 받는다 (없으면 None).
+
+    도구 블록이 끝나면 나머지 이벤트를 기다리지 않고 반환한다.
+    on_partial(snapshot)은 도구 입력 JSON이 도착할 때마다 부분 파싱된 dict로 호출된다.
+    """
+    tool_name = request["tool_choice"]["name"]
+    async with client.messages.stream(**request) as stream:
+        _RATE_LIMITER.observe(stream.response.headers)
+        async for event in stream:
+            if event.type == "input_json" and on_partial and isinstance(event.snapshot, dict):
+                on_partial(event.snapshot)
+            elif (event.type == "content_block_stop"
+                  and event.content_block.type == "tool_use"
+                  and event.content_block.name == tool_name):
+                return event.content_block.input
+    return None
+
+
+async def _atool_input(client: anthropic.AsyncAnthropic, request: dict,
+                       on_partial=None) -> dict | None:
+    """도구 입력 dict 반환 (스트리밍, 속도 제한 시 재시도)."""
+    return await _acall_with_retry(_stream_tool_input, client, request, on_partial)
+
+
+# 같은 요청은 로컬 응답 캐시에서 바로 반환
+_cached_cause_tags = cached_llm("extract_causes_batch")(_atool_input)
+_cached_product_info = cached_llm("extract_product_info")(_atool_input)
+_cached_products_batch = cached_llm("extract_products_group")(_atool_input)
+
+
+# 본문 속 가격 표기 (1,234,000원 / ₩1,234,000)
+_PRICE_RE = re.compile(r"[0-9][0-9,]*\s*원|₩\s*[0-9][0-9,]*")
+
+
+def _semantic_text(item: dict) -> str:
+    """임베딩할 텍스트: 구조화 데이터 + 축약한 본문."""
+    text = f"{item['structured_data'] or ''}\n{trim_page_content(item['page_content'])}"
+    return text[:SEMANTIC_CACHE_TEXT_CHARS]
+
+
+def _semantic_key(item: dict) -> str:
+    """의미 캐시 비교 범위: URL + 구조화 데이터·본문 가격 표기의 해시.
+
+    가격이나 JSON-LD가 바뀐 재스캔은 범위가 달라져 이전 결과를 재사용하지 않는다.
+    """
+    h = hashlib.blake2b((item["structured_data"] or "").encode("utf-8"), digest_size=16)
+    h.update("\n".join(_PRICE_RE.findall(item["page_content"])).encode("utf-8"))
+    return f"{item['url']}#{h.hexdigest()}"
+
+
+# 의미 캐시는 보조 수단이므로 임베딩 실패(모델 다운로드 실패 등)는 미스/무시로 처리한다.
+
+async def _semantic_lookup(item: dict) -> dict | None:
+    """의미 캐시 조회 (임베딩 계산은 스레드에서)."""
+    return (await _semantic_lookup_many([item]))[0]
+
+
+async def _semantic_store(item: dict, result: dict) -> None:
+    await _semantic_store_many([item], [result])
+
+
+async def _semantic_lookup_many(items: list[dict]) -> list[dict | None]:
+    """여러 제품 페이지를 한 번에 임베딩해 의미 캐시 조회 (입력 순서대로, 미스는 None)."""
+    if not semantic_cache.HAS_FASTEMBED or not items:
+        return [None] * len(items)
+    try:
+        return await asyncio.to_thread(
+            semantic_cache.lookup_many,
+            [_semantic_text(item) for item in items],
+            [_semantic_key(item) for item in items],
+        )
+    except Exception:
+        return [None] * len(items)
+
+
+async def _semantic_store_many(items: list[dict], results: list[dict]) -> None:
+    if not semantic_cache.HAS_FASTEMBED or not items:
+        return
+    try:
+        await asyncio.to_thread(
+            semantic_cache.store_many,
+            [_semantic_text(item) for item in items],
+            [_semantic_key(item) for item in items],
+            results,
+        )
+    except Exception:
+        pass
+
+
+_LOOP: asyncio.AbstractEventLoop | None = None
+_LOOP_LOCK = threading.Lock()
+
+
+def _background_loop() -> asyncio.AbstractEventLoop:
+    """비동기 호출 전용 이벤트 루프 (데몬 스레드). 공유 클라이언트의 keep-alive 연결이 호출 간 유지된다."""
+    global _LOOP
+    with _LOOP_LOCK:
+        if _LOOP is None:
+            loop = asyncio.new_event_loop()
+            threading.Thread(
+                target=loop.run_forever, name="llm-client-loop", daemon=True,
+            ).start()
+            _LOOP = loop
+    return _LOOP
+
+
+def _run_async(make_coro, progress_callback=None):
+    """make_coro(report)로 만든 코루틴을 백그라운드 루프에서 실행하고 결과를 기다린다.
+
+    코루틴이 report(*args)로 알린 진행 상황은 호출 스레드에서 progress_callback으로 전달
+    (Streamlit 위젯은 스크립트 스레드에서만 갱신 가능).
+    """
+    events = queue.SimpleQueue()
+    report = (lambda *args: events.put(args)) if progress_callback else None
+    future = asyncio.run_coroutine_threadsafe(make_coro(report), _background_loop())
+    future.add_done_callback(lambda _: events.put(None))
+    while (args := events.get()) is not None:
+        progress_callback(*args)
+    return future.result()
+
+
+async def extract_causes_batch(cases: list[dict], tag_dictionary: list[str],
+                               client: anthropic.AsyncAnthropic | None = None,
+                               on_case=None) -> list[dict]:
     """여러 케이스를 배치로 원인 추출.
 
     Args:
         cases: [{"case_id": int, "product_group": str, "product": str,
                  "action_notes": str, "request_details": str}, ...]
         tag_dictionary: 기존 태그 문자열 리스트
+        client: 공유할 비동기 클라이언트 (없으면 새로 생성)
+        on_case: (완료된 케이스 수) -> None  스트리밍 중 케이스 결과가 하나씩 완성될 때마다 호출
 
     Returns:
         [{"case_index": 1, "tags": [...], "summary": str}, ...]
     """
-    client = _get_client()
+    return await _extract_causes(
+        client or _async_client(), _cause_system(tag_dictionary), cases, on_case,
+    )
+
+
+async def _extract_causes(client: anthropic.AsyncAnthropic, system_prompt: list[dict],
+                          cases: list[dict], on_case=None) -> list[dict]:
+    """extract_causes_batch 본체 (클라이언트·system 블록은 호출 측에서 한 번 만들어 재사용)."""
+    on_partial = None
+    if on_case:
+        def on_partial(snapshot: dict):
+            # 마지막 항목은 아직 작성 중일 수 있으므로 그 앞까지만 완료로 본다
+            on_case(max(0, len(snapshot.get("cases") or []) - 1))
+
+    result = await _cached_cause_tags(
+        client, _cause_request(cases, system_prompt), on_partial=on_partial,
+    )
+    return result.get("cases", []) if result else []
+
 
+def _cause_system(tag_dictionary: list[str]) -> list[dict]:
+    """원인 추출 system 블록. 규칙(고정)과 태그 사전(실행마다 같음)을 별도 캐시 블록으로 분리."""
+    return _system_blocks(
+        SYSTEM_PROMPT, _render_tag_dictionary(tuple(tag_dictionary or ())),
+    )
+
+
+def _cause_request(cases: list[dict], system_prompt: list[dict]) -> dict:
+    """원인 추출 messages.create 인자 (실시간 호출·Batch API 공용)."""
     # 케이스 텍스트 조립
-    cases_text = ""
-    for i, case in enumerate(cases, 1):
-        cases_text += CASE_ITEM_TEMPLATE.format(
+    cases_text = "".join(
+        _render_case_item(
             index=i,
             product_group=case.get("product_group") or "(미분류)",
             product=case.get("product") or "(미분류)",
             action_notes=case.get("action_notes") or "(없음)",
             request_details=case.get("request_details") or "(없음)",
         )
-
-    user_message = BATCH_TEMPLATE.format(count=len(cases), cases_text=cases_text)
-    system_prompt = SYSTEM_PROMPT.format(
-        tag_dictionary="\n".join(f"- {t}" for t in tag_dictionary) if tag_dictionary else "(태그 사전 비어있음)"
+        for i, case in enumerate(cases, 1)
     )
 
-    def _call():
-        return client.messages.create(
-            model=ANTHROPIC_MODEL,
-            max_tokens=2048,
-            system=system_prompt,
-            messages=[{"role": "user", "content": user_message}],
-            tools=[EXTRACTION_TOOL],
-            tool_choice={"type": "tool", "name": "submit_cause_tags"},
-        )
-
-    response = _call_with_retry(_call)
-
-    # tool_use 블록 추출
-    for block in response.content:
-        if block.type == "tool_use" and block.name == "submit_cause_tags":
-            return block.input.get("cases", [])
-
-    return []
+    user_message = _canonicalize(
+        _render_cause_batch(count=len(cases), cases_text=cases_text)
+    )
+    return _tool_request(EXTRACTION_TOOL, system_prompt, user_message, max_tokens=2048)
 
 
 def generate_report(report_context: dict) -> dict:
@@ -122,69 +497,61 @@ def generate_report(report_context: dict) -> dict:
     Returns:
         {"report_text": str, "key_findings": list[str]}
     """
-    client = _get_client()
-
-    user_message = REPORT_USER_TEMPLATE.format(**report_context)
-
-    def _call():
-        return client.messages.create(
-            model=ANTHROPIC_MODEL,
-            max_tokens=4096,
-            system=REPORT_SYSTEM,
-            messages=[{"role": "user", "content": user_message}],
-            tools=[REPORT_TOOL],
-            tool_choice={"type": "tool", "name": "submit_report"},
-        )
+    user_message = _render_report_user(**report_context)
+    result = _invoke_tool(_tool_request(
+        REPORT_TOOL, _system_blocks(REPORT_SYSTEM), user_message, max_tokens=4096,
+    ))
+    if result is not None:
+        return result
 
-    response = _call_with_retry(_call)
+    return {"report_text": "", "key_findings": []}
 
-    for block in response.content:
-        if block.type == "tool_use" and block.name == "submit_report":
-            return block.input
 
-    return {"report_text": "", "key_findings": []}
+def _product_request(url: str, structured_data: str, page_content: str) -> dict:
+    """제품 1건 추출 messages.create 인자 (정확 일치 캐시 키로도 사용)."""
+    user_message = _render_product_user(
+        url=url,
+        structured_data=structured_data,
+        page_content=trim_page_content(page_content),
+    )
+    return _tool_request(
+        PRODUCT_TOOL, _system_blocks(PRODUCT_SYSTEM), user_message, max_tokens=2048,
+    )
 
 
-def extract_product_info(url: str, structured_data: str, page_content: str,
-                         fallback_image: str = "") -> dict:
+async def extract_product_info(url: str, structured_data: str, page_content: str,
+                               fallback_image: str = "",
+                               client: anthropic.AsyncAnthropic | None = None) -> dict:
     """제품 페이지에서 정보 추출.
 
     Args:
         url: 원본 URL
         structured_data: JSON-LD / 메타태그 데이터 (문자열)
-        page_content: 정제된 HTML 본문
+        page_content: 정제된 HTML 본문 (SCANNER_PROMPT_MAX_TOKENS 예산으로 축약해 전송)
         fallback_image: scraper에서 미리 추출한 이미지 URL
+        client: 공유할 비동기 클라이언트 (없으면 새로 생성)
 
     Returns:
         {"product_name": str, "brand": str, "price": int, ...}
     """
-    client = _get_client()
-
-    user_message = PRODUCT_USER_TEMPLATE.format(
-        url=url,
-        structured_data=structured_data,
-        page_content=page_content,
-    )
-
-    def _call():
-        return client.messages.create(
-            model=ANTHROPIC_MODEL,
-            max_tokens=2048,
-            system=PRODUCT_SYSTEM,
-            messages=[{"role": "user", "content": user_message}],
-            tools=[PRODUCT_TOOL],
-            tool_choice={"type": "tool", "name": "submit_product_info"},
-        )
-
-    response = _call_with_retry(_call)
-
-    for block in response.content:
-        if block.type == "tool_use" and block.name == "submit_product_info":
-            result = block.input
-            # scraper에서 추출한 이미지 URL로 보완
-            if fallback_image and not result.get("image_url"):
-                result["image_url"] = fallback_image
-            return result
+    client = client or _async_client()
+
+    request = _product_request(url, structured_data, page_content)
+    item = {"url": url, "structured_data": structured_data, "page_content": page_content}
+
+    # 정확 일치 캐시 → 같은 URL·가격의 비슷한 페이지(의미 캐시) → API 순서
+    result = response_cache.lookup("extract_product_info", request)
+    if result is None:
+        result = await _semantic_lookup(item)
+    if result is None:
+        result = await _cached_product_info(client, request)
+        if result is not None:
+            await _semantic_store(item, result)
+    if result is not None:
+        # scraper에서 추출한 이미지 URL로 보완
+        if fallback_image and not result.get("image_url"):
+            result["image_url"] = fallback_image
+        return result
 
     return {"product_name": "추출 실패", "brand": "정보 없음", "price": 0,
             "price_display": "정보 없음", "image_url": fallback_image,
@@ -192,6 +559,15 @@ def extract_product_info(url: str, structured_data: str, page_content: str,
             "size": "정보 없음", "review_summary": {}, "notable_features": []}
 
 
+_PROD_FIELDS = ("product_name", "brand", "price_display", "materials", "size")
+_PROD_DEFAULTS = {
+    **dict.fromkeys(_PROD_FIELDS, "정보 없음"),
+    "review_summary": {},
+    "notable_features": [],
+}
+_REVIEW_DEFAULTS = {"summary_text": "정보 없음"}
+
+
 def compare_products(products: list[dict]) -> dict:
     """여러 제품 비교 분석 (USP 도출).
 
@@ -201,137 +577,277 @@ def compare_products(products: list[dict]) -> dict:
     Returns:
         {"products_analysis": [...], "market_summary": str, "recommendation": str}
     """
-    client = _get_client()
-
-    products_text = ""
-    for i, p in enumerate(products, 1):
-        review = p.get("review_summary", {})
-        products_text += (
-            f"\n[제품 {i}]\n"
-            f"제품명: {p.get('product_name', '정보 없음')}\n"
-            f"브랜드: {p.get('brand', '정보 없음')}\n"
-            f"가격: {p.get('price_display', '정보 없음')}\n"
-            f"소재: {p.get('materials', '정보 없음')}\n"
-            f"크기: {p.get('size', '정보 없음')}\n"
-            f"리뷰 요약: {review.get('summary_text', '정보 없음')}\n"
-            f"주요 특징: {', '.join(p.get('notable_features', []))}\n"
+    # 기본값을 먼저 깔아 두면 루프 안에서 .get() 없이 키를 바로 꺼낼 수 있다
+    rows = [{**_PROD_DEFAULTS, **p} for p in products]
+    products_text = "".join(
+        _render_comparison_item(
+            index=i,
+            **{f: row[f] for f in _PROD_FIELDS},
+            review_text={**_REVIEW_DEFAULTS, **row["review_summary"]}["summary_text"],
+            features=", ".join(row["notable_features"]),
         )
+        for i, row in enumerate(rows, 1)
+    )
 
-    user_message = COMPARISON_USER_TEMPLATE.format(
+    user_message = _render_comparison_user(
         count=len(products), products_text=products_text
     )
 
-    def _call():
-        return client.messages.create(
-            model=ANTHROPIC_MODEL,
-            max_tokens=4096,
-            system=COMPARISON_SYSTEM,
-            messages=[{"role": "user", "content": user_message}],
-            tools=[COMPARISON_TOOL],
-            tool_choice={"type": "tool", "name": "submit_comparison"},
-        )
+    result = _invoke_tool(_tool_request(
+        COMPARISON_TOOL, _system_blocks(COMPARISON_SYSTEM), user_message, max_tokens=4096,
+    ))
+    if result is not None:
+        return result
 
-    response = _call_with_retry(_call)
+    return {"products_analysis": [], "market_summary": "", "recommendation": ""}
 
-    for block in response.content:
-        if block.type == "tool_use" and block.name == "submit_comparison":
-            return block.input
 
-    return {"products_analysis": [], "market_summary": "", "recommendation": ""}
+def _failed_product(item: dict, error: Exception) -> dict:
+    return {
+        "url": item["url"],
+        "product_name": "추출 실패",
+        "brand": "정보 없음",
+        "price": 0,
+        "price_display": "정보 없음",
+        "image_url": item.get("image_url", ""),
+        "country_of_origin": "정보 없음",
+        "materials": "정보 없음",
+        "options": [],
+        "size": "정보 없음",
+        "review_summary": {},
+        "notable_features": [],
+        "error": True,
+        "error_message": str(error),
+    }
 
 
-def extract_products_batch(urls_and_content: list[dict],
-                           progress_callback=None) -> list[dict]:
-    """여러 제품을 순차 추출 (rate limit 고려).
+async def _extract_product_group(client: anthropic.AsyncAnthropic,
+                                 items: list[dict]) -> list[dict | None]:
+    """여러 제품 페이지를 한 번의 호출로 추출. 입력 순서대로 결과 (누락된 제품은 None)."""
+    products_text = "".join(
+        _render_product_batch_item(
+            index=i,
+            url=item["url"],
+            structured_data=item["structured_data"],
+            page_content=trim_page_content(item["page_content"]),
+        )
+        for i, item in enumerate(items, 1)
+    )
+    user_message = _render_product_batch_user(
+        count=len(items), products_text=products_text,
+    )
+    result = await _cached_products_batch(client, _tool_request(
+        PRODUCT_BATCH_TOOL, _system_blocks(PRODUCT_SYSTEM), user_message,
+        max_tokens=2048 * len(items),
+    ))
+    by_index = {
+        p.get("index"): p for p in (result or {}).get("products", [])
+        if isinstance(p, dict)
+    }
+    return [by_index.get(i) for i in range(1, len(items) + 1)]
 
-    Args:
-        urls_and_content: [{"url": str, "structured_data": str,
-                            "page_content": str, "image_url": str}, ...]
-        progress_callback: (current, total, phase) -> None
 
-    Returns:
-        [{"url": str, ...extracted fields..., "error": bool}, ...]
-    """
-    results = []
+async def _extract_products_async(urls_and_content: list[dict],
+                                  progress_callback=None) -> list[dict]:
     total = len(urls_and_content)
+    try:
+        client = _async_client()
+    except ValueError as e:
+        return [_failed_product(item, e) for item in urls_and_content]
+
+    sem = asyncio.Semaphore(LLM_MAX_CONCURRENCY)
 
-    for i, item in enumerate(urls_and_content):
+    async def _extract_single(item: dict) -> dict:
         try:
-            extracted = extract_product_info(
+            return await extract_product_info(
                 url=item["url"],
                 structured_data=item["structured_data"],
                 page_content=item["page_content"],
                 fallback_image=item.get("image_url", ""),
+                client=client,
             )
-            extracted["url"] = item["url"]
-            extracted["error"] = False
-            results.append(extracted)
         except Exception as e:
-            results.append({
-                "url": item["url"],
-                "product_name": "추출 실패",
-                "brand": "정보 없음",
-                "price": 0,
-                "price_display": "정보 없음",
-                "image_url": item.get("image_url", ""),
-                "country_of_origin": "정보 없음",
-                "materials": "정보 없음",
-                "options": [],
-                "size": "정보 없음",
-                "review_summary": {},
-                "notable_features": [],
-                "error": True,
-                "error_message": str(e),
-            })
-
+            return _failed_product(item, e)
+
+    async def _bound_group(start: int, group: list[dict], extracted: list[dict | None],
+                           group_requests: list[dict]):
+        async with sem:
+            # 의미 캐시에 없는 제품만 일괄 호출로 보낸다
+            pending = [j for j, result in enumerate(extracted) if result is None]
+            if len(pending) > 1:
+                try:
+                    group_results = await _extract_product_group(
+                        client, [group[j] for j in pending],
+                    )
+                except Exception:
+                    group_results = []  # 아래에서 제품별 단건 호출로 대체
+                stored = []
+                for j, result in zip(pending, group_results):
+                    if result is not None:
+                        result.pop("index", None)
+                        # 다음 스캔에서 단건 경로와 같은 정확 일치 키로 찾을 수 있게 저장
+                        response_cache.store("extract_product_info", group_requests[j], result)
+                        extracted[j] = result
+                        stored.append(j)
+                await _semantic_store_many(
+                    [group[j] for j in stored], [extracted[j] for j in stored],
+                )
+
+            # 일괄 응답에서 빠졌거나 실패한 제품은 단건 경로로 재시도
+            for j, (item, result) in enumerate(zip(group, extracted)):
+                if result is None:
+                    extracted[j] = await _extract_single(item)
+                    continue
+                # scraper에서 추출한 이미지 URL로 보완
+                if item.get("image_url") and not result.get("image_url"):
+                    result["image_url"] = item["image_url"]
+
+        for item, result in zip(group, extracted):
+            if not result.get("error"):
+                result["url"] = item["url"]
+                result["error"] = False
+        return start, extracted
+
+    # 정확 일치 캐시를 먼저 보고, 남은 제품만 의미 캐시 조회 (임베딩 한 번)
+    product_requests = [
+        _product_request(item["url"], item["structured_data"], item["page_content"])
+        for item in urls_and_content
+    ]
+    cached = [response_cache.lookup("extract_product_info", r) for r in product_requests]
+    misses = [i for i, result in enumerate(cached) if result is None]
+    for i, result in zip(misses, await _semantic_lookup_many(
+        [urls_and_content[i] for i in misses],
+    )):
+        cached[i] = result
+
+    results = [None] * total
+    done = 0
+    tasks = [
+        _bound_group(
+            i, urls_and_content[i:i + SCANNER_EXTRACT_BATCH],
+            cached[i:i + SCANNER_EXTRACT_BATCH],
+            product_requests[i:i + SCANNER_EXTRACT_BATCH],
+        )
+        for i in range(0, total, SCANNER_EXTRACT_BATCH)
+    ]
+    for future in asyncio.as_completed(tasks):
+        start, extracted = await future
+        results[start:start + len(extracted)] = extracted
+        done += len(extracted)
         if progress_callback:
-            progress_callback(i + 1, total, "extract")
-
+            progress_callback(done, total, "extract")
     return results
 
 
-def process_cases_in_batches(all_cases: list[dict], tag_dictionary: list[str],
-                             batch_size: int = BATCH_SIZE,
-                             progress_callback=None) -> list[dict]:
-    """전체 케이스를 배치로 나누어 처리.
+def extract_products_batch(urls_and_content: list[dict],
+                           progress_callback=None) -> list[dict]:
+    """여러 제품을 SCANNER_EXTRACT_BATCH개씩 묶어 한 번의 호출로 추출하고, 묶음은 동시 처리.
+
+    묶음 응답에서 빠진 제품은 단건 호출로 다시 추출한다.
+    동시 요청 수는 LLM_MAX_CONCURRENCY로 제한.
 
     Args:
-        progress_callback: (current, total) → None  진행 상태 콜백
+        urls_and_content: [{"url": str, "structured_data": str,
+                            "page_content": str, "image_url": str}, ...]
+        progress_callback: (current, total, phase) -> None
 
     Returns:
-        모든 케이스의 결과 리스트
+        [{"url": str, ...extracted fields..., "error": bool}, ...]  (입력 순서 유지)
     """
-    all_results = []
-    total = len(all_cases)
+    return _run_async(
+        lambda report: _extract_products_async(urls_and_content, report),
+        progress_callback,
+    )
+
 
-    for i in range(0, total, batch_size):
+def _failed_batch(batch: list[dict], error: Exception) -> list[dict]:
+    return [
+        {
+            "case_index": j + 1,
+            "db_case_id": case.get("id"),
+            "tags": [],
+            "summary": f"오류: {str(error)}",
+            "error": True,
+        }
+        for j, case in enumerate(batch)
+    ]
+
+
+def _attach_case_ids(results: list[dict], all_cases: list[dict], start: int) -> None:
+    """배치 결과의 case_index(1부터)를 전체 목록의 DB case id로 매핑."""
+    for r in results:
+        actual_idx = start + r.get("case_index", 1) - 1
+        if actual_idx < len(all_cases):
+            r["db_case_id"] = all_cases[actual_idx].get("id")
+
+
+async def _process_cases_async(all_cases: list[dict], tag_dictionary: list[str],
+                               batch_size: int, progress_callback=None) -> list[dict]:
+    total = len(all_cases)
+    starts = range(0, total, batch_size)
+    try:
+        client = _async_client()
+    except ValueError as e:
+        return [r for i in starts for r in _failed_batch(all_cases[i:i + batch_size], e)]
+
+    system_prompt = _cause_system(tag_dictionary)
+    sem = asyncio.Semaphore(LLM_MAX_CONCURRENCY)
+    processed = 0
+
+    def _advance(n: int):
+        nonlocal processed
+        if n > 0:
+            processed += n
+            if progress_callback:
+                progress_callback(processed, total)
+
+    async def _run_batch(i: int):
         batch = all_cases[i:i + batch_size]
-        try:
-            results = extract_causes_batch(batch, tag_dictionary)
+        streamed = 0
+
+        # 스트리밍으로 케이스 결과가 완성될 때마다 진행률을 올린다
+        def _on_case(count: int):
+            nonlocal streamed
+            count = min(count, len(batch))
+            _advance(count - streamed)
+            streamed = max(streamed, count)
+
+        async with sem:
+            try:
+                results = await _extract_causes(
+                    client, system_prompt, batch, on_case=_on_case,
+                )
+            except Exception as e:
+                # 실패한 배치는 에러 정보와 함께 기록
+                results = _failed_batch(batch, e)
+            else:
+                _attach_case_ids(results, all_cases, i)
 
-            # case_id 매핑
-            for r in results:
-                case_idx = r.get("case_index", 1) - 1
-                actual_idx = i + case_idx
-                if actual_idx < total:
-                    r["db_case_id"] = all_cases[actual_idx].get("id")
+        _advance(len(batch) - streamed)
+        return i, results
 
-            all_results.extend(results)
-        except Exception as e:
-            # 실패한 배치는 에러 정보와 함께 기록
-            for j, case in enumerate(batch):
-                all_results.append({
-                    "case_index": j + 1,
-                    "db_case_id": case.get("id"),
-                    "tags": [],
-                    "summary": f"오류: {str(e)}",
-                    "error": True,
-                })
+    results_by_start = dict(await asyncio.gather(*(_run_batch(i) for i in starts)))
+    return [r for i in starts for r in results_by_start[i]]
 
-        if progress_callback:
-            progress_callback(min(i + batch_size, total), total)
 
-    return all_results
+def process_cases_in_batches(all_cases: list[dict], tag_dictionary: list[str],
+                             batch_size: int = BATCH_SIZE,
+                             progress_callback=None) -> list[dict]:
+    """전체 케이스를 배치로 나누어 동시 처리 (동시 요청 수는 LLM_MAX_CONCURRENCY로 제한).
+
+    Args:
+        progress_callback: (current, total) → None  진행 상태 콜백
+
+    Returns:
+        모든 케이스의 결과 리스트 (배치 순서 유지)
+    """
+    if not all_cases:
+        return []
+
+    return _run_async(
+        lambda report: _process_cases_async(all_cases, tag_dictionary, batch_size, report),
+        progress_callback,
+    )
 
 
 def analyze_spec_positioning(
@@ -356,28 +872,27 @@ def analyze_spec_positioning(
     """
     import pandas as pd
 
-    client = _get_client()
-
     product_col = column_config["product_col"]
     price_col = column_config["price_col"]
     spec_cols = column_config["spec_cols"]
 
-    # 제품 상세 텍스트 생성
-    products_text = ""
+    # 제품 상세 텍스트 생성 — 열 단위 문자열 연산으로 제품별 블록을 만들고 한 번에 join
     sorted_df = scored_df.sort_values(price_col)
-    for _, row in sorted_df.iterrows():
-        name = str(row[product_col])
-        cat = categories.get(name, "미분류")
-        products_text += f"\n  [{name}] (분류: {cat})\n"
-        products_text += f"    가격: {row[price_col]:,.0f}\n"
-        products_text += f"    스펙 점수: {row['spec_score']:.1f}\n"
-        for sc in spec_cols:
-            products_text += f"    {sc}: {row[sc]}\n"
+    names = sorted_df[product_col].astype(str)
+    blocks = (
+        "\n  [" + names + "] (분류: " + names.map(categories).fillna("미분류") + ")\n"
+        + "    가격: " + sorted_df[price_col].map("{:,.0f}".format) + "\n"
+        + "    스펙 점수: " + sorted_df["spec_score"].map("{:.1f}".format) + "\n"
+    )
+    for sc in spec_cols:
+        blocks = blocks + f"    {sc}: " + sorted_df[sc].astype(str) + "\n"
+    products_text = "".join(blocks.tolist())
 
     # 가중치 텍스트
-    weights_text = ""
-    for name, w in sorted(weights.items(), key=lambda x: x[1], reverse=True):
-        weights_text += f"  {name}: {w:.1%}\n"
+    weights_text = "".join(
+        f"  {name}: {w:.1%}\n"
+        for name, w in sorted(weights.items(), key=lambda x: x[1], reverse=True)
+    )
 
     # 카테고리별 수
     cat_series = pd.Series(list(categories.values()))
@@ -386,7 +901,7 @@ def analyze_spec_positioning(
     # 우리 제품 섹션
     our_product_section = ""
     if our_product:
-        our_product_section = SPEC_OUR_PRODUCT_TEMPLATE.format(
+        our_product_section = _render_spec_our_product(
             name=our_product["product_name"],
             price=our_product["price"],
             score=our_product["spec_score"],
@@ -395,7 +910,7 @@ def analyze_spec_positioning(
             value_index=our_product.get("value_index", 0),
         )
 
-    user_message = SPEC_USER_TEMPLATE.format(
+    user_message = _render_spec_user(
         product_count=len(scored_df),
         spec_columns=", ".join(spec_cols),
         price_range=f"{scored_df[price_col].min():,.0f} ~ {scored_df[price_col].max():,.0f}",
@@ -409,21 +924,11 @@ def analyze_spec_positioning(
         our_product_section=our_product_section,
     )
 
-    def _call():
-        return client.messages.create(
-            model=ANTHROPIC_MODEL,
-            max_tokens=4096,
-            system=SPEC_SYSTEM,
-            messages=[{"role": "user", "content": user_message}],
-            tools=[STRATEGY_TOOL],
-            tool_choice={"type": "tool", "name": "submit_positioning_strategy"},
-        )
-
-    response = _call_with_retry(_call)
-
-    for block in response.content:
-        if block.type == "tool_use" and block.name == "submit_positioning_strategy":
-            return block.input
+    result = _invoke_tool(_tool_request(
+        STRATEGY_TOOL, _system_blocks(SPEC_SYSTEM), user_message, max_tokens=4096,
+    ))
+    if result is not None:
+        return result
 
     return {
         "market_overview": "",
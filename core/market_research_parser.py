@@ -12,12 +12,16 @@
 
 from __future__ import annotations
 
+import math
 import re
 from typing import BinaryIO
 
 import numpy as np
+import openpyxl
 import pandas as pd
 
+from core.excel_parser import PANDAS_EXCEL_ENGINE
+
 
 # ── 알려진 행 라벨 → 표준 필드 매핑 ──
 
@@ -39,6 +43,14 @@ _FIELD_MAP = {
 }
 
 _SKIP_ROWS = {"이미지", "리뷰"}  # 데이터 없는 행
+_PRICE_STRIP = re.compile(r"[,원₩]")   # 숫자 변환 전 제거할 문자
+_OUR_BRAND_RE = re.compile("데스커|퍼시스")  # 우리 제품 브랜드
+
+# 제품 dict의 값 필드 순서 (specs, isOurProduct는 뒤에 추가)
+_PRODUCT_COLUMNS = [
+    "name", "brand", "price", "shippingFee", "actualPrice",
+    "seller", "material", "origin", "url",
+]
 
 
 def _is_market_research_sheet(sheet_name: str) -> bool:
@@ -46,29 +58,42 @@ def _is_market_research_sheet(sheet_name: str) -> bool:
     return "(시장조사)" in sheet_name
 
 
-def _clean_value(val) -> str | float | None:
-    """셀 값을 정리."""
-    if pd.isna(val) or val is None:
-        return None
-    s = str(val).strip()
-    if s in ("", "NaN", "nan"):
-        return None
-    return s
-
-
 def _try_float(val) -> float | None:
     """문자열을 숫자로 변환 시도."""
     if val is None:
         return None
     if isinstance(val, (int, float)):
-        return float(val) if not np.isnan(val) else None
-    s = str(val).strip().replace(",", "").replace("원", "").replace("₩", "")
+        return float(val) if not math.isnan(val) else None
     try:
-        return float(s)
+        # 앞뒤 공백은 float()가 무시하므로 strip 불필요
+        return float(_PRICE_STRIP.sub("", str(val)))
     except ValueError:
         return None
 
 
+def _read_market_sheets(file: str | BinaryIO):
+    """시장조사 시트만 (시트명, 헤더 없는 원본 DataFrame)으로 순서대로 반환.
+
+    calamine이 있으면 pandas calamine 엔진, 없으면 openpyxl read-only 스트리밍
+    (스타일·셀 객체를 만들지 않고 값만 읽는다).
+    """
+    if PANDAS_EXCEL_ENGINE == "calamine":
+        xls = pd.ExcelFile(file, engine="calamine")
+        for sheet_name in xls.sheet_names:
+            if _is_market_research_sheet(sheet_name):
+                yield sheet_name, pd.read_excel(xls, sheet_name=sheet_name, header=None)
+        return
+
+    wb = openpyxl.load_workbook(file, read_only=True, data_only=True)
+    try:
+        for sheet_name in wb.sheetnames:
+            if _is_market_research_sheet(sheet_name):
+                rows = list(wb[sheet_name].iter_rows(values_only=True))
+                yield sheet_name, pd.DataFrame(rows)
+    finally:
+        wb.close()
+
+
 def parse_market_research_excel(
     file: str | BinaryIO,
 ) -> dict:
@@ -101,15 +126,10 @@ def parse_market_research_excel(
         }
     """
     filename = getattr(file, "name", "unknown.xlsx")
-    xls = pd.ExcelFile(file, engine="openpyxl")
 
     result = {"filename": filename, "categories": []}
 
-    for sheet_name in xls.sheet_names:
-        if not _is_market_research_sheet(sheet_name):
-            continue
-
-        df = pd.read_excel(xls, sheet_name=sheet_name, header=None)
+    for sheet_name, df in _read_market_sheets(file):
         if df.empty or df.shape[1] < 2:
             continue
 
@@ -126,105 +146,96 @@ def _parse_sheet(df: pd.DataFrame, sheet_name: str) -> dict | None:
     # 나머지 열은 각 제품의 값
 
     # 행 라벨 추출 (첫 번째 열)
-    row_labels = df.iloc[:, 0].apply(
-        lambda x: str(x).strip() if pd.notna(x) else ""
-    ).tolist()
-
-    # 제품 열 인덱스 (1부터)
-    product_col_start = 1
-    product_col_end = df.shape[1]
+    first_col = df.iloc[:, 0]
+    row_labels = first_col.astype(str).str.strip().where(first_col.notna(), "").tolist()
 
     # 이름 행 찾기
-    name_row = None
-    for i, label in enumerate(row_labels):
-        if label in ("이름", "제품명"):
-            name_row = i
-            break
-
+    name_row = next(
+        (i for i, label in enumerate(row_labels) if label in ("이름", "제품명")), None,
+    )
     if name_row is None:
         return None
 
-    # 제품별 데이터 추출
-    products = []
-    known_fields = set()
-    spec_fields = []
-
-    for col_idx in range(product_col_start, product_col_end):
-        product_name = _clean_value(df.iloc[name_row, col_idx])
-        if not product_name:
-            continue
-
-        product = {
-            "name": str(product_name),
-            "brand": "",
-            "price": 0.0,
-            "shippingFee": None,
-            "actualPrice": None,
-            "seller": None,
-            "material": None,
-            "origin": None,
-            "url": None,
-            "specs": {},
-            "isOurProduct": False,
-        }
-
-        # 우리 제품 판별 (데스커, 퍼시스 관련)
-        for row_i, label in enumerate(row_labels):
-            if label == "브랜드":
-                brand_val = _clean_value(df.iloc[row_i, col_idx])
-                if brand_val and any(
-                    kw in str(brand_val) for kw in ("데스커", "퍼시스")
-                ):
-                    product["isOurProduct"] = True
-                break
-
-        # 각 행의 데이터를 필드에 매핑
-        for row_i, label in enumerate(row_labels):
-            if not label or label in _SKIP_ROWS:
-                continue
-
-            val = _clean_value(df.iloc[row_i, col_idx])
-            std_field = _FIELD_MAP.get(label)
-
-            if std_field == "name":
-                continue  # 이미 처리
-            elif std_field == "brand":
-                product["brand"] = str(val) if val else ""
-            elif std_field == "price":
-                fval = _try_float(val)
-                if fval is not None:
-                    product["price"] = fval
-            elif std_field == "shippingFee":
-                product["shippingFee"] = str(val) if val else None
-            elif std_field == "actualPrice":
-                fval = _try_float(val)
-                if fval is not None:
-                    product["actualPrice"] = fval
-            elif std_field == "seller":
-                product["seller"] = str(val) if val else None
-            elif std_field == "material":
-                product["material"] = str(val) if val else None
-            elif std_field == "origin":
-                product["origin"] = str(val) if val else None
-            elif std_field == "url":
-                product["url"] = str(val) if val else None
-            elif std_field is None and row_i != name_row:
-                # 알 수 없는 행 → specs에 저장
-                if label and val:
-                    product["specs"][label] = str(val)
-                    if label not in known_fields:
-                        known_fields.add(label)
-                        spec_fields.append(label)
-
-        # 실판매가 계산 (없으면 가격 + 배송비로 추정)
-        if product["actualPrice"] is None and product["price"] > 0:
-            ship = _try_float(product.get("shippingFee"))
-            if ship is not None and ship > 0:
-                product["actualPrice"] = product["price"] + ship
-            else:
-                product["actualPrice"] = product["price"]
-
-        products.append(product)
+    # 제품을 행으로 전치하고 셀 값을 한 번에 정리 (열 = 원본 행 번호, 빈 값은 None)
+    t = df.iloc[:, 1:].T.reset_index(drop=True)
+    t.columns = range(len(row_labels))
+    text = t.astype(str).apply(lambda c: c.str.strip())
+    cells = text.where(t.notna() & ~text.isin(["", "NaN", "nan"]))
+    cells = cells[cells[name_row].notna()].reset_index(drop=True)
+    cells = cells.astype(object).where(cells.notna(), None)
+    if cells.empty:
+        return {"name": sheet_name.replace("(시장조사)", "").strip(),
+                "spec_fields": [], "products": []}
+
+    field_rows = [
+        (row_i, label, _FIELD_MAP.get(label))
+        for row_i, label in enumerate(row_labels)
+        if label and label not in _SKIP_ROWS
+    ]
+
+    def rows_of(field: str) -> list[int]:
+        return [row_i for row_i, _, f in field_rows if f == field]
+
+    def last_text(field: str) -> pd.Series:
+        # 같은 필드가 여러 행이면 마지막 행 값 (빈 값이어도 덮어씀)
+        rows = rows_of(field)
+        return cells[rows[-1]] if rows else pd.Series(None, index=cells.index, dtype=object)
+
+    def last_number(field: str) -> pd.Series:
+        # 숫자로 읽히는 마지막 행 값
+        number = pd.Series(np.nan, index=cells.index)
+        for row_i in rows_of(field):
+            parsed = cells[row_i].map(_try_float).astype(float)
+            number = parsed.where(parsed.notna(), number)
+        return number
+
+    out = pd.DataFrame({"name": cells[name_row]})
+    out["brand"] = last_text("brand").fillna("")
+    out["price"] = last_number("price").fillna(0.0)
+    for field in ("shippingFee", "seller", "material", "origin", "url"):
+        out[field] = last_text(field)
+
+    # 실판매가 (없으면 가격 + 배송비로 추정, 가격이 없으면 None)
+    ship = out["shippingFee"].map(_try_float).astype(float)
+    estimated = out["price"] + ship.where(ship > 0, 0.0)
+    actual = last_number("actualPrice")
+    out["actualPrice"] = actual.where(actual.notna(), estimated.where(out["price"] > 0))
+
+    # 우리 제품 판별 (데스커, 퍼시스 관련) — 첫 번째 브랜드 행 기준
+    brand_row = next((i for i, label in enumerate(row_labels) if label == "브랜드"), None)
+    if brand_row is None:
+        is_ours = pd.Series(False, index=cells.index)
+    else:
+        is_ours = cells[brand_row].str.contains(_OUR_BRAND_RE, na=False)
+
+    # 알 수 없는 행 → specs (값이 있는 경우만, 같은 라벨은 뒤 행이 덮어씀)
+    spec_rows = [
+        (row_i, label) for row_i, label, f in field_rows if f is None and row_i != name_row
+    ]
+    spec_values = cells[[row_i for row_i, _ in spec_rows]].to_numpy()
+    specs = [
+        {label: val for (_, label), val in zip(spec_rows, row) if val}
+        for row in spec_values
+    ]
+
+    # 스펙 필드 순서: 처음 값이 나온 (제품, 행) 순
+    # (스펙 행마다 첫 제품을 한 번에 구하고, 같은 라벨은 가장 이른 (제품, 행)을 쓴다)
+    present = spec_values.astype(bool)
+    first_product = present.argmax(axis=0)
+    first_seen: dict[str, tuple[int, int]] = {}
+    for (row_i, label), has_value, first in zip(
+        spec_rows, present.any(axis=0), first_product,
+    ):
+        if has_value:
+            first_seen[label] = min(first_seen.get(label, (first, row_i)), (first, row_i))
+    spec_fields = sorted(first_seen, key=first_seen.get)
+
+    out = out[_PRODUCT_COLUMNS]
+    products = out.astype(object).where(out.notna(), None).to_dict("records")
+    for product, spec, ours in zip(products, specs, is_ours.tolist()):
+        product["price"] = float(product["price"])
+        product["specs"] = spec
+        product["isOurProduct"] = bool(ours)
 
     # 카테고리명 정리 (시장조사) 접두어 제거
     cat_name = sheet_name.replace("(시장조사)", "").strip()
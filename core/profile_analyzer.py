@@ -3,11 +3,17 @@
 from __future__ import annotations
 
 import re
+import threading
+import weakref
+from collections import OrderedDict
 from pathlib import Path
 from typing import BinaryIO
 
+import numpy as np
 import pandas as pd
 
+from core import frame_cache
+from core.excel_parser import PANDAS_EXCEL_ENGINE
 from config import (
     PROFILE_DIMENSIONS,
     PROFILE_CATEGORY_COLUMNS,
@@ -18,6 +24,9 @@ from config import (
 
 ALL_METRICS = PROFILE_PAYMENT_METRICS + PROFILE_REFUND_METRICS
 
+# 카테고리형(dtype="category")으로 저장할 저카디널리티 문자열 컬럼 (상품ID는 제외)
+_CATEGORICAL_COLUMNS = [c for c in PROFILE_CATEGORY_COLUMNS if c != "상품ID"] + ["attribute_value"]
+
 
 # ───────────────────────────────────────────
 # 파일 식별
@@ -91,7 +100,13 @@ def parse_profile_excel(
     Returns:
         DataFrame — 카테고리 컬럼 + attribute_value + 지표 컬럼.
     """
-    raw_df = pd.read_excel(file, sheet_name=sheet_name, engine="openpyxl")
+    # 같은 파일·차원·시트를 이미 파싱했으면 Parquet 캐시에서 바로 반환
+    cache_key = frame_cache.make_key(file, "profile", dimension, sheet_name)
+    cached = frame_cache.load(cache_key)
+    if cached is not None:
+        return cached
+
+    raw_df = pd.read_excel(file, sheet_name=sheet_name, engine=PANDAS_EXCEL_ENGINE)
 
     # 컬럼명 공백 정리
     raw_df.columns = [str(c).strip() for c in raw_df.columns]
@@ -106,6 +121,12 @@ def parse_profile_excel(
         # ── 와이드 포맷: 속성값이 컬럼 접두어로 존재 ──
         df = _parse_wide_format(raw_df, dimension)
 
+    # 반복되는 문자열을 정수 코드로 — groupby·필터가 코드 비교로 처리된다
+    for col in _CATEGORICAL_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].astype("category")
+
+    frame_cache.save(cache_key, df)
     return df
 
 
@@ -169,45 +190,41 @@ def _parse_wide_format(raw_df: pd.DataFrame, dimension: str) -> pd.DataFrame:
     # 카테고리 컬럼 식별
     cat_cols = [c for c in PROFILE_CATEGORY_COLUMNS if c in raw_df.columns]
 
-    records: list[dict] = []
-    for _, row in raw_df.iterrows():
-        cat_data = {c: row[c] for c in cat_cols}
+    # 행 i의 속성값 j → 결과 행 i * len(attr_values) + j (원본 행 순서 유지)
+    n_rows, n_attrs = len(raw_df), len(attr_values)
+    df = raw_df[cat_cols].iloc[np.repeat(np.arange(n_rows), n_attrs)].reset_index(drop=True)
+    df["attribute_value"] = np.tile(np.asarray(attr_values, dtype=object), n_rows)
 
-        for attr_val in attr_values:
-            rec = {**cat_data, "attribute_value": attr_val}
-            for metric in ALL_METRICS:
-                col_name = _find_metric_column(raw_df.columns, attr_val, metric)
-                rec[metric] = _safe_numeric(row.get(col_name)) if col_name else 0.0
-            records.append(rec)
-
-    df = pd.DataFrame(records)
+    # 지표별로 (행 × 속성값) 행렬을 채워 펼친다
+    metric_columns = _map_metric_columns(raw_df.columns, attr_values)
     for metric in ALL_METRICS:
-        if metric in df.columns:
-            df[metric] = pd.to_numeric(df[metric], errors="coerce").fillna(0)
+        block = np.zeros((n_rows, n_attrs))
+        for j, attr_val in enumerate(attr_values):
+            col_name = metric_columns.get((attr_val, metric))
+            if col_name is not None:
+                block[:, j] = (
+                    pd.to_numeric(raw_df[col_name], errors="coerce").fillna(0).to_numpy(float)
+                )
+        df[metric] = block.ravel()
     return df
 
 
-def _find_metric_column(
+def _map_metric_columns(
     columns: pd.Index,
-    attr_value: str,
-    metric: str,
-) -> str | None:
-    """속성값+지표 조합에 해당하는 컬럼명을 찾는다."""
+    attr_values: list[str],
+) -> dict[tuple[str, str], str]:
+    """컬럼을 한 번 훑어 (속성값, 지표) → 컬럼명 매핑을 만든다 (조합마다 처음 나온 컬럼)."""
+    mapping: dict[tuple[str, str], str] = {}
     for col in columns:
         col_str = str(col)
-        if attr_value in col_str and metric in col_str:
-            return col
-    return None
-
-
-def _safe_numeric(val) -> float:
-    """값을 float로 변환 (None, NaN, 과학적 표기법 처리)."""
-    if val is None or (isinstance(val, float) and pd.isna(val)):
-        return 0.0
-    try:
-        return float(val)
-    except (ValueError, TypeError):
-        return 0.0
+        metrics = [m for m in ALL_METRICS if m in col_str]
+        if not metrics:
+            continue
+        for attr_value in attr_values:
+            if attr_value in col_str:
+                for metric in metrics:
+                    mapping.setdefault((attr_value, metric), col)
+    return mapping
 
 
 # ───────────────────────────────────────────
@@ -231,10 +248,10 @@ def compute_percentage_distribution(
     Returns:
         DataFrame — category, 속성값별 %, 속성값별 _abs, 합계.
     """
-    work_df = df.copy()
-
+    # 아래 연산은 모두 새 객체를 만들므로 복사하지 않고 필요할 때만 마스크로 거른다
+    work_df = df
     if exclude_unknown:
-        work_df = work_df[work_df["attribute_value"] != PROFILE_UNKNOWN_VALUE]
+        work_df = df.loc[df["attribute_value"] != PROFILE_UNKNOWN_VALUE]
 
     group_col = "상품명" if agg_level == "상품" else agg_level
 
@@ -243,7 +260,7 @@ def compute_percentage_distribution(
 
     # groupby → pivot
     grouped = (
-        work_df.groupby([group_col, "attribute_value"])[metric]
+        work_df.groupby([group_col, "attribute_value"], observed=True)[metric]
         .sum()
         .reset_index()
     )
@@ -253,26 +270,26 @@ def compute_percentage_distribution(
         values=metric,
         fill_value=0,
         aggfunc="sum",
+        observed=True,
     )
 
     # 합계
     pivot["합계"] = pivot.sum(axis=1)
 
-    attr_values = [c for c in pivot.columns if c != "합계"]
+    total = pivot.pop("합계")
+    attr_values = list(pivot.columns)
 
-    rows: list[dict] = []
-    for category in pivot.index:
-        row: dict = {"category": category}
-        total = pivot.loc[category, "합계"]
-        for attr_val in attr_values:
-            abs_val = pivot.loc[category, attr_val]
-            pct = round(abs_val / total * 100, 1) if total > 0 else 0.0
-            row[attr_val] = pct
-            row[f"{attr_val}_abs"] = abs_val
-        row["합계"] = total
-        rows.append(row)
+    # 속성값별 % (합계가 0 이하인 카테고리는 0.0)
+    pct_df = (pivot.div(total.where(total > 0), axis=0) * 100).round(1).fillna(0.0)
+    abs_df = pivot.add_suffix("_abs")
 
-    result_df = pd.DataFrame(rows)
+    # 컬럼 순서: category, 속성값, 속성값_abs, …, 합계
+    result_df = pd.concat([pct_df, abs_df], axis=1)[
+        [c for attr_val in attr_values for c in (attr_val, f"{attr_val}_abs")]
+    ]
+    result_df.columns = list(result_df.columns)
+    result_df.insert(0, "category", pivot.index.astype(object))
+    result_df["합계"] = total
     result_df = result_df.sort_values("합계", ascending=False).reset_index(drop=True)
     return result_df
 
@@ -283,6 +300,28 @@ def compute_percentage_distribution(
 
 _LEVEL_HIERARCHY = ["대분류", "중분류", "소분류", "세분류", "상품"]
 
+# (id(df), 컬럼) → (df 약한 참조, {값: 행 위치 배열}). 업로드된 프레임은 세션 동안 그대로이므로
+# 클릭할 때마다 전체 비교 대신 해시 조회로 행을 고른다. 프레임을 제자리에서 수정하면 안 된다.
+_VALUE_INDEX: OrderedDict[tuple[int, str], tuple[weakref.ref, dict]] = OrderedDict()
+_VALUE_INDEX_SIZE = 16
+_VALUE_INDEX_LOCK = threading.Lock()
+
+
+def _rows_with_value(df: pd.DataFrame, col: str, value) -> pd.DataFrame:
+    """df[df[col] == value]와 같은 결과를 컬럼별 값 인덱스로 조회."""
+    key = (id(df), col)
+    with _VALUE_INDEX_LOCK:
+        entry = _VALUE_INDEX.get(key)
+        if entry is not None and entry[0]() is df:
+            _VALUE_INDEX.move_to_end(key)
+            positions = entry[1]
+        else:
+            positions = df.groupby(col, sort=False, observed=True).indices
+            _VALUE_INDEX[key] = (weakref.ref(df), positions)
+            if len(_VALUE_INDEX) > _VALUE_INDEX_SIZE:
+                _VALUE_INDEX.popitem(last=False)
+    return df.iloc[positions.get(value, [])]
+
 
 def get_drilldown_data(
     df: pd.DataFrame,
@@ -299,7 +338,7 @@ def get_drilldown_data(
     child_level = _LEVEL_HIERARCHY[idx + 1]
     parent_col = "상품명" if parent_level == "상품" else parent_level
 
-    filtered = df[df[parent_col] == parent_value]
+    filtered = _rows_with_value(df, parent_col, parent_value)
     if filtered.empty:
         return pd.DataFrame()
 
@@ -336,18 +375,18 @@ def compute_integrated_view(
     for dimension, df in all_data.items():
         if group_col not in df.columns:
             continue
-        filtered = df[df[group_col] == category_value]
+        filtered = _rows_with_value(df, group_col, category_value)
         if filtered.empty:
             continue
 
-        work = filtered.copy()
+        work = filtered
         if exclude_unknown:
-            work = work[work["attribute_value"] != PROFILE_UNKNOWN_VALUE]
+            work = filtered.loc[filtered["attribute_value"] != PROFILE_UNKNOWN_VALUE]
 
         if metric not in work.columns:
             continue
 
-        grouped = work.groupby("attribute_value")[metric].sum()
+        grouped = work.groupby("attribute_value", observed=True)[metric].sum()
         total = grouped.sum()
 
         row: dict = {}
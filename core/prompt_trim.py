@@ -0,0 +1,101 @@
+"""Claude 전송 전 제품 페이지 입력 축약 — 본문 토큰 예산 + 구조화 데이터 압축.
+
+토큰 수는 API 호출 없이 문자 종류로 추정한다 (한글 등 비ASCII 1자 ≈ 1토큰, ASCII 4자 ≈ 1토큰).
+"""
+
+import json
+import re
+
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+from config import SCANNER_PROMPT_MAX_TOKENS
+
+# 제품 정보가 모여 있을 가능성이 높은 줄 (가격·소재·브랜드·원산지·크기·리뷰)
+_KEYWORD_RE = re.compile(
+    r"가격|판매가|할인|[0-9][0-9,]*\s*원|₩|소재|재질|원단|브랜드|제조|원산지|"
+    r"사이즈|크기|규격|치수|[0-9]+\s*(?:mm|cm)|리뷰|후기|별점|평점|"
+    r"price|material|brand|origin|size|dimension|review|rating",
+    re.I,
+)
+_NON_ASCII_RE = re.compile(r"[^\x00-\x7f]")
+
+WINDOW_LINES = 20           # 점수를 매기는 본문 구간 크기 (줄)
+_GAP_MARKER = "..."
+
+# JSON-LD / 메타태그에서 제품 정보와 무관한 키
+_DROP_KEYS = frozenset({
+    "@context", "@id", "image", "logo", "thumbnailUrl", "potentialAction",
+    "sameAs", "breadcrumb", "mainEntityOfPage",
+})
+
+
+def estimate_tokens(text: str) -> int:
+    """대략적인 토큰 수."""
+    non_ascii = len(_NON_ASCII_RE.findall(text))
+    return non_ascii + (len(text) - non_ascii + 3) // 4
+
+
+def trim_page_content(text: str, max_tokens: int = SCANNER_PROMPT_MAX_TOKENS) -> str:
+    """본문을 토큰 예산 안으로 축약.
+
+    예산을 넘으면 WINDOW_LINES줄 구간별로 키워드 점수를 매겨, 첫 구간(제품명·상단 정보)과
+    점수가 높은 구간(동점이면 앞쪽)을 예산이 찰 때까지 골라 원래 순서대로 이어 붙인다.
+    생략된 자리는 "..."로 표시.
+    """
+    if estimate_tokens(text) <= max_tokens:
+        return text
+
+    lines = text.split("\n")
+    windows = [
+        "\n".join(lines[i:i + WINDOW_LINES]) for i in range(0, len(lines), WINDOW_LINES)
+    ]
+    costs = [estimate_tokens(w) for w in windows]
+    scores = [len(_KEYWORD_RE.findall(w)) for w in windows]
+
+    # 첫 구간 우선, 이후 점수 높은 순 (동점이면 앞쪽)
+    order = [0] + sorted(range(1, len(windows)), key=lambda i: (-scores[i], i))
+    chosen = []
+    used = 0
+    for i in order:
+        if used + costs[i] > max_tokens:
+            continue
+        chosen.append(i)
+        used += costs[i]
+
+    if not chosen:
+        # 첫 구간 하나가 예산보다 크면 글자 수로 자른다
+        return text[:max_tokens] + "\n" + _GAP_MARKER
+
+    chosen.sort()
+    parts = []
+    prev = -1
+    for i in chosen:
+        if i != prev + 1:
+            parts.append(_GAP_MARKER)
+        parts.append(windows[i])
+        prev = i
+    if prev != len(windows) - 1:
+        parts.append(_GAP_MARKER)
+    return "\n".join(parts)
+
+
+def _strip(value):
+    if isinstance(value, dict):
+        return {k: _strip(v) for k, v in value.items() if k not in _DROP_KEYS}
+    if isinstance(value, list):
+        return [_strip(v) for v in value]
+    return value
+
+
+def compact_json(value) -> str:
+    """무관한 키를 뺀 뒤 키 정렬·공백 없는 JSON 문자열로 직렬화 (orjson이 있으면 사용)."""
+    value = _strip(value)
+    if HAS_ORJSON:
+        return orjson.dumps(value, default=str, option=orjson.OPT_SORT_KEYS).decode("utf-8")
+    return json.dumps(
+        value, ensure_ascii=False, sort_keys=True, separators=(",", ":"), default=str,
+    )
@@ -0,0 +1,149 @@
+"""Claude 응답 로컬 캐시 — 요청 내용의 해시 키 → 도구 입력(dict).
+
+같은 요청(모델·프롬프트·도구)이 다시 오면 API를 호출하지 않고 저장된 결과를 돌려준다.
+메모리 LRU 앞단 + SQLite 파일 영속 저장, 항목은 LLM_CACHE_TTL_SECONDS 후 만료.
+"""
+
+import functools
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+from config import DATA_DIR, LLM_CACHE_PATH, LLM_CACHE_TTL_SECONDS, LLM_CACHE_MEMORY_SIZE
+
+# 메모리 캐시: 키 → (저장 시각, 직렬화된 값). 반환할 때마다 새 dict로 역직렬화한다.
+_MEMORY: OrderedDict[str, tuple[float, str]] = OrderedDict()
+_LOCK = threading.Lock()
+_CONN: sqlite3.Connection | None = None
+
+
+def dumps(value) -> str:
+    """JSON 문자열로 직렬화 (orjson이 있으면 사용)."""
+    if HAS_ORJSON:
+        return orjson.dumps(value).decode("utf-8")
+    return json.dumps(value, ensure_ascii=False)
+
+
+def loads(text: str):
+    """dumps의 역변환."""
+    return orjson.loads(text) if HAS_ORJSON else json.loads(text)
+
+
+def make_key(fn: str, **parts) -> str:
+    """함수 이름과 요청 구성 요소로 결정적 키 생성 (정렬된 JSON의 blake2b 128비트 해시)."""
+    payload = {"fn": fn, **parts}
+    if HAS_ORJSON:
+        data = orjson.dumps(
+            payload, default=str, option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS,
+        )
+    else:
+        data = json.dumps(
+            payload, sort_keys=True, ensure_ascii=False, default=str,
+        ).encode("utf-8")
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def _connect() -> sqlite3.Connection:
+    global _CONN
+    if _CONN is None:
+        DATA_DIR.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(LLM_CACHE_PATH, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            """CREATE TABLE IF NOT EXISTS llm_cache (
+                   key        TEXT PRIMARY KEY,
+                   value      TEXT NOT NULL,
+                   created_at REAL NOT NULL
+               )"""
+        )
+        _CONN = conn
+    return _CONN
+
+
+def _remember(key: str, created_at: float, value: str) -> None:
+    _MEMORY[key] = (created_at, value)
+    _MEMORY.move_to_end(key)
+    if len(_MEMORY) > LLM_CACHE_MEMORY_SIZE:
+        _MEMORY.popitem(last=False)
+
+
+def get(key: str) -> dict | None:
+    """캐시된 값 (없거나 만료되면 None)."""
+    expire_before = time.time() - LLM_CACHE_TTL_SECONDS
+    with _LOCK:
+        hit = _MEMORY.get(key)
+        if hit is None:
+            try:
+                row = _connect().execute(
+                    "SELECT created_at, value FROM llm_cache WHERE key = ?", (key,),
+                ).fetchone()
+            except sqlite3.Error:
+                return None
+            if row is None:
+                return None
+            hit = (row[0], row[1])
+            _remember(key, *hit)
+        else:
+            _MEMORY.move_to_end(key)
+
+        if hit[0] < expire_before:
+            _MEMORY.pop(key, None)
+            return None
+    return loads(hit[1])
+
+
+def put(key: str, value: dict) -> None:
+    """값 저장. 디스크 저장에 실패해도 메모리 캐시에는 남는다."""
+    now = time.time()
+    serialized = dumps(value)
+    with _LOCK:
+        _remember(key, now, serialized)
+        try:
+            conn = _connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, created_at) VALUES (?, ?, ?)",
+                (key, serialized, now),
+            )
+            conn.commit()
+        except sqlite3.Error:
+            pass
+
+
+def lookup(fn_name: str, request: dict) -> dict | None:
+    """cached_llm(fn_name)이 저장한 request의 결과 (API를 호출하지 않고 확인만)."""
+    return get(make_key(fn_name, **request))
+
+
+def store(fn_name: str, request: dict, value: dict) -> None:
+    """cached_llm(fn_name)의 키로 결과 저장 (다른 경로로 얻은 같은 요청의 결과를 재사용할 때)."""
+    put(make_key(fn_name, **request), value)
+
+
+def cached_llm(fn_name: str):
+    """`async def f(client, request: dict, **kwargs) -> dict | None` 형태의 호출을 캐시하는 데코레이터.
+
+    키는 fn_name과 request 전체(모델·system·messages·tools 등)로 만든다. None 결과는 저장하지 않는다.
+    kwargs(콜백 등)는 키에 포함하지 않고 그대로 전달한다.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(client, request: dict, **kwargs):
+            key = make_key(fn_name, **request)
+            cached = get(key)
+            if cached is not None:
+                return cached
+            result = await func(client, request, **kwargs)
+            if result is not None:
+                put(key, result)
+            return result
+        return wrapper
+    return decorator
@@ -9,6 +9,7 @@ import httpx
 from bs4 import BeautifulSoup
 
 from config import SCANNER_REQUEST_TIMEOUT, SCANNER_MAX_HTML_LENGTH, SCANNER_CONCURRENT_FETCHES
+from core.prompt_trim import compact_json
 
 # Playwright는 선택적 의존성
 try:
@@ -244,7 +245,7 @@ def clean_html(raw_html: str, url: str) -> tuple[str, str, str]:
     image_url = ""
 
     if json_ld:
-        structured_parts.append(f"[JSON-LD]\n{json.dumps(json_ld, ensure_ascii=False, indent=2)}")
+        structured_parts.append(f"[JSON-LD]\n{compact_json(json_ld)}")
         # JSON-LD에서 이미지 URL 추출
         img = json_ld.get("image")
         if isinstance(img, list) and img:
@@ -255,7 +256,7 @@ def clean_html(raw_html: str, url: str) -> tuple[str, str, str]:
             image_url = img.get("url", "")
 
     if meta_tags:
-        structured_parts.append(f"[메타태그]\n{json.dumps(meta_tags, ensure_ascii=False, indent=2)}")
+        structured_parts.append(f"[메타태그]\n{compact_json(meta_tags)}")
         if not image_url:
             image_url = meta_tags.get("image", "")
 
@@ -0,0 +1,162 @@
+"""Claude 응답 의미 캐시 — 임베딩 유사도로 비슷한 입력의 결과를 재사용.
+
+정확 일치 캐시(core.response_cache)가 놓치는 사소한 표현 차이를 잡기 위한 2단 캐시.
+항목은 키(호출 측이 정한 비교 범위 — 제품 추출은 URL + 가격·구조화 데이터 해시)가 같을 때만
+비교하고, LLM_CACHE_TTL_SECONDS가 지나면 만료된다.
+fastembed가 없으면 조회는 항상 미스, 저장은 무시된다 (첫 사용 시 임베딩 모델을 내려받는다).
+"""
+
+import atexit
+import threading
+import time
+
+import numpy as np
+
+try:
+    from fastembed import TextEmbedding
+    HAS_FASTEMBED = True
+except ImportError:
+    HAS_FASTEMBED = False
+
+from core.response_cache import dumps, loads
+from config import (
+    DATA_DIR, LLM_CACHE_TTL_SECONDS, SEMANTIC_CACHE_DIR, SEMANTIC_CACHE_MODEL,
+    SEMANTIC_CACHE_THRESHOLD, SEMANTIC_CACHE_MAX_ENTRIES,
+)
+
+_LOCK = threading.Lock()
+_MODEL = None
+_MODEL_ERROR: Exception | None = None   # 모델 로드 실패 시 재시도(재다운로드)하지 않는다
+_LOADED = False
+_DIRTY = False
+_EMBEDDINGS: np.ndarray | None = None   # (N, dim) L2 정규화된 float32
+_KEYS: list[str] = []                   # 항목별 키 (행 순서 = _EMBEDDINGS)
+_CREATED: list[float] = []              # 항목별 저장 시각 (time.time())
+_RESULTS: list[str] = []                # 직렬화된 결과
+
+EMBED_BATCH_SIZE = 32       # 한 번에 모델에 넣는 문장 수
+
+_EMB_FILE = "embeddings.npy"
+_RES_FILE = "results.json"
+
+
+def _embed(texts: list[str]) -> np.ndarray:
+    global _MODEL, _MODEL_ERROR
+    if _MODEL is None:
+        if _MODEL_ERROR is not None:
+            raise _MODEL_ERROR
+        try:
+            _MODEL = TextEmbedding(SEMANTIC_CACHE_MODEL)
+        except Exception as e:
+            _MODEL_ERROR = e
+            raise
+    vecs = np.asarray(list(_MODEL.embed(texts, batch_size=EMBED_BATCH_SIZE)), dtype=np.float32)
+    norms = np.linalg.norm(vecs, axis=1, keepdims=True)
+    return vecs / np.where(norms > 0, norms, 1)
+
+
+def _load() -> None:
+    """디스크에 저장된 인덱스를 한 번만 읽는다 (_LOCK 안에서 호출)."""
+    global _LOADED, _EMBEDDINGS, _KEYS, _CREATED, _RESULTS
+    if _LOADED:
+        return
+    _LOADED = True
+    emb_path = SEMANTIC_CACHE_DIR / _EMB_FILE
+    res_path = SEMANTIC_CACHE_DIR / _RES_FILE
+    if not (emb_path.exists() and res_path.exists()):
+        return
+    try:
+        embeddings = np.load(emb_path)
+        meta = loads(res_path.read_text(encoding="utf-8"))
+        keys, created, results = meta["keys"], meta["created_at"], meta["results"]
+    except (OSError, ValueError, KeyError, TypeError):
+        return  # 이전 형식(키·시각 없음) 파일은 버린다
+    if len(embeddings) == len(keys) == len(created) == len(results):
+        _EMBEDDINGS, _KEYS, _CREATED, _RESULTS = embeddings, keys, created, results
+
+
+def lookup(text: str, key: str) -> dict | None:
+    """같은 키의 저장 입력 중 가장 비슷한 것의 코사인 유사도가 SEMANTIC_CACHE_THRESHOLD 이상이면 그 결과."""
+    return lookup_many([text], [key])[0]
+
+
+def lookup_many(texts: list[str], keys: list[str]) -> list[dict | None]:
+    """여러 입력을 한 번에 임베딩해 조회 (입력 순서대로 결과, 미스는 None).
+
+    만료되지 않은 같은 키의 항목이 있는 입력만 임베딩한다.
+    """
+    hits: list[str | None] = [None] * len(texts)
+    if not HAS_FASTEMBED or not texts:
+        return hits
+    with _LOCK:
+        _load()
+        if _EMBEDDINGS is None or not len(_EMBEDDINGS):
+            return hits
+        stored_keys = np.asarray(_KEYS, dtype=object)
+        fresh = np.asarray(_CREATED) >= time.time() - LLM_CACHE_TTL_SECONDS
+        candidates = {}
+        for q, key in enumerate(keys):
+            rows = np.flatnonzero((stored_keys == key) & fresh)
+            if rows.size:
+                candidates[q] = rows
+        if candidates:
+            queries = list(candidates)
+            vecs = _embed([texts[q] for q in queries])
+            for vec, q in zip(vecs, queries):
+                rows = candidates[q]
+                scores = _EMBEDDINGS[rows] @ vec
+                best = int(scores.argmax())
+                if scores[best] >= SEMANTIC_CACHE_THRESHOLD:
+                    hits[q] = _RESULTS[rows[best]]
+    return [loads(h) if h is not None else None for h in hits]
+
+
+def store(text: str, key: str, result: dict) -> None:
+    """입력 텍스트와 결과를 인덱스에 추가 (만료 항목 제거, 최근 SEMANTIC_CACHE_MAX_ENTRIES개 유지)."""
+    store_many([text], [key], [result])
+
+
+def store_many(texts: list[str], keys: list[str], results: list[dict]) -> None:
+    """store의 일괄 버전 (임베딩을 한 번에 계산)."""
+    global _EMBEDDINGS, _KEYS, _CREATED, _RESULTS, _DIRTY
+    if not HAS_FASTEMBED or not texts:
+        return
+    with _LOCK:
+        _load()
+        vecs = _embed(texts)
+        now = time.time()
+        embeddings = vecs if _EMBEDDINGS is None else np.vstack([_EMBEDDINGS, vecs])
+        all_keys = _KEYS + list(keys)
+        created = _CREATED + [now] * len(texts)
+        serialized = _RESULTS + [dumps(r) for r in results]
+
+        expire_before = now - LLM_CACHE_TTL_SECONDS
+        keep = [i for i, t in enumerate(created) if t >= expire_before]
+        keep = keep[-SEMANTIC_CACHE_MAX_ENTRIES:]
+        _EMBEDDINGS = embeddings[keep]
+        _KEYS = [all_keys[i] for i in keep]
+        _CREATED = [created[i] for i in keep]
+        _RESULTS = [serialized[i] for i in keep]
+        _DIRTY = True
+
+
+def save() -> None:
+    """변경된 인덱스를 디스크에 기록 (프로세스 종료 시 자동 호출)."""
+    global _DIRTY
+    with _LOCK:
+        if not _DIRTY or _EMBEDDINGS is None:
+            return
+        try:
+            DATA_DIR.mkdir(parents=True, exist_ok=True)
+            SEMANTIC_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+            np.save(SEMANTIC_CACHE_DIR / _EMB_FILE, _EMBEDDINGS)
+            (SEMANTIC_CACHE_DIR / _RES_FILE).write_text(
+                dumps({"keys": _KEYS, "created_at": _CREATED, "results": _RESULTS}),
+                encoding="utf-8",
+            )
+        except OSError:
+            return
+        _DIRTY = False
+
+
+atexit.register(save)
@@ -41,7 +41,9 @@ if file_exists(conn, file_hash):
 # ── 2. 임시 저장 & 시트 감지 ──
 UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
 tmp_path = UPLOAD_DIR / uploaded_file.name
-tmp_path.write_bytes(file_bytes)
+# 재실행마다 다시 쓰면 수정시각이 바뀌어 열린 워크북 캐시를 못 쓰므로 내용이 다를 때만 기록
+if not tmp_path.exists() or tmp_path.read_bytes() != file_bytes:
+    tmp_path.write_bytes(file_bytes)
 
 sheets_info = detect_sheets(tmp_path)
 
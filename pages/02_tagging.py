@@ -7,7 +7,7 @@ from config import HIGH_CONFIDENCE_THRESHOLD, LOW_CONFIDENCE_THRESHOLD
 from core.database import (
     get_connection, get_uploaded_months, get_cases_by_month,
     get_untagged_cases, get_all_tags, upsert_case_tag,
-    get_case_tags, add_tag, add_new_tag_candidate, record_edit,
+    get_case_tags_by_month, add_tag, add_new_tag_candidate, record_edit,
 )
 from core.tag_engine import find_matching_tag, suggest_similar_tags
 from core.llm_client import process_cases_in_batches
@@ -127,12 +127,16 @@ with tab_review:
         horizontal=True,
     )
 
+    # 월 전체 케이스의 태그를 한 번에 조회 (케이스별 쿼리 방지)
+    tags_by_case = get_case_tags_by_month(conn, selected_month)
+    all_tags = get_all_tags(conn)
+
     if filter_option == "미태깅":
         cases_to_show = untagged
     elif filter_option == "저확신 (검수 필요)":
         cases_to_show = []
         for case in all_cases:
-            case_tags_list = get_case_tags(conn, case["id"])
+            case_tags_list = tags_by_case.get(case["id"], [])
             has_low = any(
                 (t.get("confidence") or 0) < HIGH_CONFIDENCE_THRESHOLD
                 and not t.get("is_final")
@@ -174,7 +178,7 @@ with tab_review:
                 )
 
                 # 현재 태그
-                current_tags = get_case_tags(conn, case["id"])
+                current_tags = tags_by_case.get(case["id"], [])
                 if current_tags:
                     st.markdown("**AI 제안 태그:**")
                     for ct in current_tags:
@@ -215,7 +219,6 @@ with tab_review:
                                     st.rerun()
 
                 # 수동 태그 추가
-                all_tags = get_all_tags(conn)
                 if all_tags:
                     with st.form(f"manual_tag_{case['id']}"):
                         manual_tag = st.selectbox(
@@ -44,6 +44,8 @@ _DEFAULTS = {
     "spec_column_config": None,
     "spec_weights": None,
     "spec_scored_df": None,
+    "spec_stats": None,  # 가격/스펙 점수 min·max·median
+    "spec_select_options": {},  # 시뮬레이션 폼 selectbox 옵션 (컬럼명 → 고유값 목록)
     "spec_categories": None,
     "spec_our_product": None,
     "spec_ai_analysis": None,
@@ -58,6 +60,8 @@ for key, default in _DEFAULTS.items():
 def _reset_analysis():
     """분석 관련 상태를 초기화한다."""
     st.session_state.spec_scored_df = None
+    st.session_state.spec_stats = None
+    st.session_state.spec_select_options = {}
     st.session_state.spec_categories = None
     st.session_state.spec_our_product = None
     st.session_state.spec_ai_analysis = None
@@ -282,7 +286,11 @@ if st.session_state.spec_weights and st.session_state.spec_column_config:
             scored_df, config["product_col"], config["price_col"],
         )
 
+        # 가격/스펙 점수 통계는 한 번만 집계해 맵·시뮬레이션 폼에서 재사용
+        stats = scored_df[[config["price_col"], "spec_score"]].agg(["min", "max", "median"])
+
         st.session_state.spec_scored_df = scored_df
+        st.session_state.spec_stats = stats
         st.session_state.spec_categories = categories
 
         st.divider()
@@ -293,8 +301,8 @@ if st.session_state.spec_weights and st.session_state.spec_column_config:
         mc1.metric("제품 수", f"{len(scored_df)}개")
         mc2.metric("스펙 항목", f"{len(config['spec_cols'])}개")
         mc3.metric("평균 스펙 점수", f"{scored_df['spec_score'].mean():.1f}")
-        price_min = scored_df[config["price_col"]].min()
-        price_max = scored_df[config["price_col"]].max()
+        price_min = stats.at["min", config["price_col"]]
+        price_max = stats.at["max", config["price_col"]]
         mc4.metric("가격 범위", f"{price_min:,.0f} ~ {price_max:,.0f}")
 
         tab1, tab2, tab3 = st.tabs(["데이터 테이블", "포지셔닝 맵", "AI 전략 분석"])
@@ -308,6 +316,7 @@ if st.session_state.spec_weights and st.session_state.spec_column_config:
             fig = build_positioning_map(
                 scored_df, config, categories,
                 our_product=st.session_state.spec_our_product,
+                stats=stats,
             )
             st.plotly_chart(fig, use_container_width=True, theme=None)
 
@@ -354,7 +363,14 @@ if st.session_state.spec_scored_df is not None:
     config = st.session_state.spec_column_config
     raw_df = st.session_state.spec_raw_df
 
-    our_specs = render_simulation_form(config, raw_df)
+    stats = st.session_state.spec_stats
+    median_price = (
+        int(stats.at["median", config["price_col"]]) if stats is not None else None
+    )
+    our_specs = render_simulation_form(
+        config, raw_df, median_price=median_price,
+        select_options=st.session_state.spec_select_options,
+    )
 
     if our_specs:
         our_result = simulate_our_product(
@@ -9,8 +9,10 @@ SYSTEM_PROMPT = """당신은 데스커(Desker) 사무용 가구의 하자보수
 3. 기존 태그에 정확히 맞는 것이 없으면, 가장 유사한 기존 태그와 새로 제안하는 표현을 모두 반환하세요.
 4. 각 태그에 대해 확신도(0.0~1.0)를 함께 반환하세요.
 5. 태그는 간결한 명사구로 작성하세요 (예: "상판 휨", "서랍 레일 불량", "도장 벗겨짐").
+"""
 
-기존 태그 사전:
+# 시스템 프롬프트 뒤에 별도 블록으로 붙는 태그 사전 (규칙 부분과 따로 캐시)
+TAG_DICTIONARY_TEMPLATE = """기존 태그 사전:
 {tag_dictionary}
 """
 
@@ -112,6 +112,52 @@ EXTRACTION_TOOL = {
 }
 
 
+# ── 여러 제품 일괄 추출 (한 번의 호출로 N개 페이지) ──
+
+BATCH_USER_TEMPLATE = """다음은 가구 제품 페이지 {count}개에서 추출한 콘텐츠입니다.
+각 제품의 정보를 구조화된 형식으로 추출해주세요.
+결과의 index는 반드시 [제품 N]의 번호 N과 같아야 합니다.
+
+{products_text}"""
+
+BATCH_ITEM_TEMPLATE = """[제품 {index}]
+■ URL: {url}
+
+■ 구조화된 데이터 (JSON-LD / 메타태그):
+{structured_data}
+
+■ 페이지 본문:
+{page_content}
+
+"""
+
+BATCH_EXTRACTION_TOOL = {
+    "name": "submit_products_info",
+    "description": "여러 제품 페이지에서 추출한 정보를 한 번에 제출합니다.",
+    "input_schema": {
+        "type": "object",
+        "properties": {
+            "products": {
+                "type": "array",
+                "description": "제품별 추출 결과",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "index": {
+                            "type": "integer",
+                            "description": "제품 번호 (1부터 시작)"
+                        },
+                        **EXTRACTION_TOOL["input_schema"]["properties"],
+                    },
+                    "required": ["index", *EXTRACTION_TOOL["input_schema"]["required"]],
+                }
+            }
+        },
+        "required": ["products"]
+    }
+}
+
+
 # ── 제품 비교 분석 ──
 
 COMPARISON_SYSTEM = """당신은 가구 시장 분석 전문가입니다.
@@ -131,6 +177,17 @@ COMPARISON_USER_TEMPLATE = """다음 {count}개 가구 제품을 비교 분석
 
 각 제품별 고유 판매 포인트와 전체 시장 포지셔닝을 분석해주세요."""
 
+COMPARISON_ITEM_TEMPLATE = """
+[제품 {index}]
+제품명: {product_name}
+브랜드: {brand}
+가격: {price_display}
+소재: {materials}
+크기: {size}
+리뷰 요약: {review_text}
+주요 특징: {features}
+"""
+
 COMPARISON_TOOL = {
     "name": "submit_comparison",
     "description": "제품 비교 분석 결과를 제출합니다.",
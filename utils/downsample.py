@@ -0,0 +1,49 @@
+"""시계열 다운샘플링 유틸리티 (tsdownsample 미설치 환경용 LTTB)."""
+
+import numpy as np
+
+try:
+    from numba import njit
+    HAS_NUMBA = True
+except ImportError:
+    HAS_NUMBA = False
+
+    def njit(*args, **kwargs):
+        """numba 미설치 시 원본 함수를 그대로 반환하는 데코레이터."""
+        def decorator(fn):
+            return fn
+        return decorator
+
+
+@njit(cache=True, fastmath=True)
+def lttb_indices(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """Largest-Triangle-Three-Buckets로 유지할 포인트 인덱스를 반환.
+
+    첫/끝 포인트는 항상 포함하고, 나머지 구간을 n_out-2개 버킷으로 나눠
+    버킷마다 삼각형 면적이 가장 큰 포인트 하나를 고른다.
+    """
+    n = y.shape[0]
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    idx = np.empty(n_out, dtype=np.int64)
+    idx[0] = 0
+    idx[n_out - 1] = n - 1
+
+    bucket = (n - 2) / (n_out - 2)
+    a = 0
+    for i in range(n_out - 2):
+        lo = int(i * bucket) + 1
+        hi = int((i + 1) * bucket) + 1
+        # 다음 버킷 평균 (마지막 버킷의 다음은 끝 포인트)
+        next_hi = min(int((i + 2) * bucket) + 1, n)
+        avg_x = x[hi:next_hi].mean()
+        avg_y = y[hi:next_hi].mean()
+
+        area = np.abs(
+            (x[a] - avg_x) * (y[lo:hi] - y[a])
+            - (x[a] - x[lo:hi]) * (avg_y - y[a])
+        )
+        a = lo + int(np.argmax(area))
+        idx[i + 1] = a
+    return idx
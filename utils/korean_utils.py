@@ -1,6 +1,9 @@
 """한국어 텍스트 정규화 유틸리티."""
 
 import re
+from functools import lru_cache
+
+_KEYWORD_RE = re.compile(r"[가-힣]{2,}")
 
 
 def normalize_whitespace(text: str) -> str:
@@ -29,5 +32,11 @@ def extract_keywords(text: str, min_length: int = 2) -> list[str]:
     """텍스트에서 키워드(한글 2자 이상 단어) 추출."""
     if not text:
         return []
-    words = re.findall(r"[가-힣]{2,}", text)
+    words = _KEYWORD_RE.findall(text)
     return list(dict.fromkeys(words))  # 중복 제거, 순서 유지
+
+
+@lru_cache(maxsize=4096)
+def keyword_set(text: str) -> frozenset[str]:
+    """extract_keywords 결과의 집합 (같은 원문은 캐시에서 반환)."""
+    return frozenset(extract_keywords(text))